@@ -0,0 +1,116 @@
+"""move portfolio files to blob store
+
+Revision ID: 8d2f6a0c5e71
+Revises: 3b7c1e9d4a52
+Create Date: 2026-10-18 11:03:27.514906
+
+Portfolio PDFs used to be stored base64-encoded in classification_json["__file_token"].
+They now live in the content-addressed blob store (services.blob_store) and the row
+keeps only file_sha256/file_size. Upgrade moves existing payloads out of the JSON;
+downgrade inlines them again.
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a0c5e71'
+down_revision: Union[str, Sequence[str], None] = '3b7c1e9d4a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same layout as services.blob_store, inlined so the migration does not import the
+# services package (and with it the OpenAI/PDF/OCR stack).
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+BLOB_STORE_DIR = BACKEND_DIR / os.getenv('BLOB_STORE_DIR', 'storage/blobs')
+
+
+def _blob_path(sha256: str) -> Path:
+    return BLOB_STORE_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def _put_bytes(data: bytes) -> str:
+    sha256 = hashlib.sha256(data).hexdigest()
+    dest = _blob_path(sha256)
+    if dest.is_file():
+        return sha256
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return sha256
+
+
+portfolio = sa.table(
+    'portfolio',
+    sa.column('id', sa.Integer()),
+    sa.column('classification_json', sa.JSON()),
+    sa.column('file_sha256', sa.String(length=64)),
+    sa.column('file_size', sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('portfolio', sa.Column('file_sha256', sa.String(length=64), nullable=True))
+    op.add_column('portfolio', sa.Column('file_size', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_portfolio_file_sha256'), 'portfolio', ['file_sha256'], unique=False)
+
+    conn = op.get_bind()
+    # Stream ids first so only one decoded file is held in memory at a time.
+    ids = [r.id for r in conn.execute(sa.select(portfolio.c.id).order_by(portfolio.c.id))]
+    for pid in ids:
+        classification = conn.execute(
+            sa.select(portfolio.c.classification_json).where(portfolio.c.id == pid)
+        ).scalar()
+        if not isinstance(classification, dict):
+            continue
+        token = classification.get('__file_token')
+        if not isinstance(token, str) or not token.strip():
+            continue
+        try:
+            file_bytes = base64.b64decode(token, validate=True)
+        except Exception:
+            # Corrupted payloads stay inline; GET /portfolio/{id}/file reports them.
+            continue
+        sha256 = _put_bytes(file_bytes)
+        classification = {k: v for k, v in classification.items() if k != '__file_token'}
+        conn.execute(
+            portfolio.update()
+            .where(portfolio.c.id == pid)
+            .values(file_sha256=sha256, file_size=len(file_bytes), classification_json=classification)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(portfolio.c.id, portfolio.c.file_sha256).where(portfolio.c.file_sha256.isnot(None))
+    ).all()
+    for pid, sha256 in rows:
+        classification = conn.execute(
+            sa.select(portfolio.c.classification_json).where(portfolio.c.id == pid)
+        ).scalar()
+        classification = dict(classification) if isinstance(classification, dict) else {}
+        classification['__file_token'] = base64.b64encode(_blob_path(sha256).read_bytes()).decode('ascii')
+        conn.execute(
+            portfolio.update().where(portfolio.c.id == pid).values(classification_json=classification)
+        )
+
+    op.drop_index(op.f('ix_portfolio_file_sha256'), table_name='portfolio')
+    op.drop_column('portfolio', 'file_size')
+    op.drop_column('portfolio', 'file_sha256')
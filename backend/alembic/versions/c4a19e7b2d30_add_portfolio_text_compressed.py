@@ -0,0 +1,66 @@
+"""add portfolio text_compressed
+
+Revision ID: c4a19e7b2d30
+Revises: 8d2f6a0c5e71
+Create Date: 2026-10-18 14:22:05.318240
+
+Stores the extracted portfolio text (zlib, see services.portfolio_text) so evaluations
+can be re-run without the client resending it. Upgrade backfills it from portfolio_page
+rows where a portfolio has them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    from backend.services.portfolio_text import compress_text
+except ModuleNotFoundError:
+    from services.portfolio_text import compress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a19e7b2d30'
+down_revision: Union[str, Sequence[str], None] = '8d2f6a0c5e71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+portfolio = sa.table(
+    'portfolio',
+    sa.column('id', sa.Integer()),
+    sa.column('text_compressed', sa.LargeBinary()),
+)
+portfolio_page = sa.table(
+    'portfolio_page',
+    sa.column('portfolio_id', sa.Integer()),
+    sa.column('page_number', sa.Integer()),
+    sa.column('text', sa.String()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('portfolio', sa.Column('text_compressed', sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    ids = [
+        r.portfolio_id
+        for r in conn.execute(sa.select(portfolio_page.c.portfolio_id).distinct())
+    ]
+    for pid in ids:
+        texts = conn.execute(
+            sa.select(portfolio_page.c.text)
+            .where(portfolio_page.c.portfolio_id == pid)
+            .order_by(portfolio_page.c.page_number)
+        ).scalars()
+        # Same joining as OpenAIService.extract_text_from_pdf
+        text = "\n\n".join(t or "" for t in texts).strip()
+        if text:
+            conn.execute(
+                portfolio.update().where(portfolio.c.id == pid).values(text_compressed=compress_text(text))
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('portfolio', 'text_compressed')
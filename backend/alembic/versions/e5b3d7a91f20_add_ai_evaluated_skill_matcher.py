@@ -0,0 +1,32 @@
+"""add ai_evaluated_skill matcher
+
+Revision ID: e5b3d7a91f20
+Revises: c4a19e7b2d30
+Create Date: 2026-10-18 16:05:41.902317
+
+Records which criteria matcher (services.matchers) produced each AI row, so a lexical
+preview cannot silently replace an LLM evaluation. Existing rows came from the LLM
+matcher, the only one there was.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b3d7a91f20'
+down_revision: Union[str, Sequence[str], None] = 'c4a19e7b2d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ai_evaluated_skill', sa.Column('matcher', sa.String(), nullable=True))
+    op.execute("UPDATE ai_evaluated_skill SET matcher = 'openai'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ai_evaluated_skill', 'matcher')
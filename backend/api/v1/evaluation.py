@@ -1,12 +1,13 @@
+import asyncio
 import logging
 import base64
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse, Response
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, undefer
 
 import models
 from api.deps import db_dependency
@@ -27,8 +28,18 @@ from schemas import (
     TeacherEvaluatedSkillBase,
     TeacherEvaluatedSkillModel,
 )
+from services.blob_store import blob_path
+from services.portfolio_text import decompress_text
+from services.ocr_pool import OCRPoolBusyError
+from services.matchers import get_matcher
 from services.openai_service import get_openai_service
-from services.ai_evaluation import run_portfolio_ai_evaluation, PortfolioAIEvaluationResult
+from services.ai_evaluation import (
+    PortfolioAIEvaluationResult,
+    complete_portfolio_ai_evaluation,
+    matcher_name,
+    prepare_portfolio_ai_evaluation,
+    run_portfolio_ai_evaluation,
+)
 from services.rubric_snapshot import apply_time_based_expiry_on_history
 
 logger = logging.getLogger(__name__)
@@ -66,8 +77,27 @@ def _apply_time_based_expiry_for_evaluations(
             db.refresh(e)
 
 
+def _known_pages_for_portfolio(db: Session, portfolio_id: int) -> dict[str, str]:
+    """Fingerprint -> text of the pages stored for an existing portfolio (404 if missing)."""
+    if not db.query(models.Portfolio).filter(models.Portfolio.id == portfolio_id).first():
+        raise HTTPException(status_code=404, detail=f"portfolio_id {portfolio_id} not found")
+    rows = (
+        db.query(models.PortfolioPage.fingerprint, models.PortfolioPage.text)
+        .filter(models.PortfolioPage.portfolio_id == portfolio_id)
+        .all()
+    )
+    return {fp: text for fp, text in rows if fp and text is not None}
+
+
 @router.post("/portfolio/import")
-async def extract_document(file: UploadFile = File(...)):
+async def extract_document(
+    db: db_dependency,
+    file: UploadFile = File(...),
+    portfolio_id: Optional[int] = Form(
+        None,
+        description="Existing portfolio this upload revises; its unchanged pages are reused.",
+    ),
+):
     try:
         if not file.filename or not file.filename.lower().endswith(".pdf"):
             raise HTTPException(
@@ -75,17 +105,17 @@ async def extract_document(file: UploadFile = File(...)):
                 detail="Invalid file type. Please upload a PDF file (.pdf)",
             )
 
+        known_pages = (
+            _known_pages_for_portfolio(db, portfolio_id) if portfolio_id is not None else None
+        )
         openai_service = get_openai_service()
-        extracted = await openai_service.extract_text_from_pdf(file)
+        extracted = await openai_service.extract_text_from_pdf(file, known_pages=known_pages)
 
         text = extracted["text"]
         logger.info("Extracted text: %s...", text[:100])
         metadata = extracted["metadata"]
-        await file.seek(0)
-        file_bytes = await file.read()
-        # Store payload in DB later via ai_evaluation/run request body.
-        # Keep field name "file_token" for frontend compatibility.
-        file_token = base64.b64encode(file_bytes).decode("ascii")
+        # The file stays staged server-side; ai_evaluation/run claims it by this token.
+        file_token = extracted["file_token"]
 
         return JSONResponse(
             status_code=200,
@@ -97,9 +127,16 @@ async def extract_document(file: UploadFile = File(...)):
                 "original_filename": file.filename,
             },
         )
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error("Validation error: %s", e)
         raise HTTPException(status_code=400, detail=str(e)) from e
+    except OCRPoolBusyError as e:
+        logger.warning("OCR pool saturated: %s", e)
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        ) from e
     except Exception as e:
         logger.error("Error extracting PDF text: %s", e)
         raise HTTPException(
@@ -108,44 +145,203 @@ async def extract_document(file: UploadFile = File(...)):
         ) from e
 
 
-@router.get("/portfolio/{portfolio_id}", response_model=PortfolioModel)
-async def read_portfolio(portfolio_id: int, db: db_dependency):
-    row = db.query(models.Portfolio).filter(models.Portfolio.id == portfolio_id).first()
+# Response field -> deferred Portfolio column; only loaded and returned when listed in ?include=
+PORTFOLIO_HEAVY_FIELDS = {
+    "classification_json": "classification_json",
+    "text": "text_compressed",
+}
+PORTFOLIO_FIELDS = ("id", "filename", "created_at", "file_sha256", "file_size")
+
+
+def _parse_portfolio_include(include: Optional[str]) -> list[str]:
+    fields = [f.strip() for f in (include or "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in PORTFOLIO_HEAVY_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"unknown include field(s) {', '.join(unknown)}; allowed: {', '.join(PORTFOLIO_HEAVY_FIELDS)}",
+        )
+    return fields
+
+
+@router.get(
+    "/portfolio/{portfolio_id}",
+    response_model=PortfolioModel,
+    response_model_exclude_unset=True,
+)
+async def read_portfolio(
+    portfolio_id: int,
+    db: db_dependency,
+    include: Optional[str] = Query(
+        None,
+        description=f"Comma-separated heavy fields to include: {', '.join(PORTFOLIO_HEAVY_FIELDS)}",
+    ),
+):
+    fields = _parse_portfolio_include(include)
+    query = db.query(models.Portfolio).filter(models.Portfolio.id == portfolio_id)
+    for field in fields:
+        query = query.options(undefer(getattr(models.Portfolio, PORTFOLIO_HEAVY_FIELDS[field])))
+    row = query.first()
     if not row:
         raise HTTPException(status_code=404, detail=f"portfolio_id {portfolio_id} not found")
-    return row
+    data = {f: getattr(row, f) for f in PORTFOLIO_FIELDS}
+    if "classification_json" in fields:
+        data["classification_json"] = row.classification_json
+    if "text" in fields:
+        data["text"] = decompress_text(row.text_compressed)
+    return PortfolioModel(**data)
+
+
+# Immutable blobs: a URL carrying ?v=<file_sha256> can be cached for a year.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Unversioned URL: the portfolio may later point at a new file, so always revalidate (cheap via ETag).
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+FILE_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_file_range(path, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes [start, end] (inclusive) of ``path`` in FILE_STREAM_CHUNK_SIZE pieces."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(FILE_STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _parse_byte_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    (first, last) inclusive offsets for a single ``bytes=`` range.
+
+    Returns None when the header should be ignored and the whole file served
+    (unknown unit, multiple ranges, malformed spec), and raises 416 when the range
+    cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    # Both positions are plain digit runs; int() alone would accept "-1", "+1" or "1_0".
+    if not sep or not (first or last) or not all(p.isdigit() for p in (first, last) if p):
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            start, end = max(0, size - suffix), size - 1
+            if suffix <= 0:
+                start = size
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+    except ValueError:
+        return None
+    if start < 0:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [t.strip() for t in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
 
 
 @router.get("/portfolio/{portfolio_id}/file")
-async def read_portfolio_file(portfolio_id: int, db: db_dependency):
+async def read_portfolio_file(
+    portfolio_id: int,
+    request: Request,
+    db: db_dependency,
+    v: Optional[str] = None,
+):
+    """
+    Stream the stored portfolio PDF.
+
+    Supports single-range ``Range`` requests (with ``If-Range``), ``ETag`` /
+    ``If-None-Match`` revalidation, and long-lived caching when ``v`` equals the
+    file's SHA-256 (see ``PortfolioModel.file_sha256``).
+    """
     row = db.query(models.Portfolio).filter(models.Portfolio.id == portfolio_id).first()
     if not row:
         raise HTTPException(status_code=404, detail=f"portfolio_id {portfolio_id} not found")
 
-    classification = row.classification_json if isinstance(row.classification_json, dict) else {}
-    file_blob_b64 = classification.get("__file_token")
-    if not isinstance(file_blob_b64, str) or not file_blob_b64.strip():
-        raise HTTPException(status_code=404, detail="portfolio file is not stored")
-    try:
-        file_bytes = base64.b64decode(file_blob_b64, validate=True)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="stored portfolio file is corrupted") from e
-
     download_name = row.filename or "portfolio.pdf"
     if not download_name.lower().endswith(".pdf"):
         download_name = f"{download_name}.pdf"
     # Starlette encodes header values as latin-1; use RFC 5987 filename* for unicode names.
     latin1_fallback_name = download_name.encode("latin-1", errors="replace").decode("latin-1")
     encoded_utf8_name = quote(download_name, safe="")
-    return Response(
-        content=file_bytes,
+    content_disposition = (
+        f'inline; filename="{latin1_fallback_name}"; '
+        f"filename*=UTF-8''{encoded_utf8_name}"
+    )
+
+    if not row.file_sha256:
+        # Legacy rows not yet moved to the blob store by migration 8d2f6a0c5e71.
+        classification = row.classification_json if isinstance(row.classification_json, dict) else {}
+        file_blob_b64 = classification.get("__file_token")
+        if not isinstance(file_blob_b64, str) or not file_blob_b64.strip():
+            raise HTTPException(status_code=404, detail="portfolio file is not stored")
+        try:
+            file_bytes = base64.b64decode(file_blob_b64, validate=True)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="stored portfolio file is corrupted") from e
+        return Response(
+            content=file_bytes,
+            media_type="application/pdf",
+            headers={"Content-Disposition": content_disposition},
+        )
+
+    path = blob_path(row.file_sha256)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail="stored portfolio file is missing") from e
+
+    etag = f'"{row.file_sha256}"'
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if v == row.file_sha256 else REVALIDATE_CACHE_CONTROL
+        ),
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    headers = {
+        **cache_headers,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition,
+    }
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_byte_range(range_header, size)
+
+    if byte_range is None:
+        start, end = 0, size - 1
+        status_code = 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _iter_file_range(path, start, end),
+        status_code=status_code,
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": (
-                f'inline; filename="{latin1_fallback_name}"; '
-                f"filename*=UTF-8''{encoded_utf8_name}"
-            )
-        },
+        headers=headers,
     )
 
 
@@ -174,20 +370,25 @@ def _portfolio_evaluate_response_from_result(
             )
             for e in result.evaluations
         ],
+        failed_skills=result.failed_skills,
+        matcher=result.matcher,
     )
 
 
 @router.post("/portfolio/evaluate", response_model=PortfolioEvaluateResponse)
 async def evaluate_and_save(
-    text: str,
     rubric_id: int,
     user_id: int,
     db: db_dependency,
+    text: str | None = None,
     filename: str | None = None,
     skill_evaluation_id: int | None = None,
+    portfolio_id: int | None = None,
+    matcher: str | None = None,
 ):
+    """Query-parameter variant of /ai_evaluation/run; omit text to reuse the stored text."""
     try:
-        openai_service = get_openai_service()
+        openai_service = get_matcher(matcher)
         result = await run_portfolio_ai_evaluation(
             db,
             text=text,
@@ -197,6 +398,7 @@ async def evaluate_and_save(
             file_token=None,
             openai_service=openai_service,
             skill_evaluation_id=skill_evaluation_id,
+            portfolio_id=portfolio_id,
         )
         return _portfolio_evaluate_response_from_result(result)
     except ValueError as e:
@@ -212,7 +414,7 @@ async def evaluate_and_save(
 @router.post("/ai_evaluation/run", response_model=PortfolioEvaluateResponse)
 async def ai_evaluation_run(body: PortfolioEvaluateRequest, db: db_dependency):
     try:
-        openai_service = get_openai_service()
+        openai_service = get_matcher(body.matcher)
         result = await run_portfolio_ai_evaluation(
             db,
             text=body.text,
@@ -222,6 +424,7 @@ async def ai_evaluation_run(body: PortfolioEvaluateRequest, db: db_dependency):
             file_token=body.file_token,
             openai_service=openai_service,
             skill_evaluation_id=body.skill_evaluation_id,
+            portfolio_id=body.portfolio_id,
         )
         return _portfolio_evaluate_response_from_result(result)
     except ValueError as e:
@@ -234,6 +437,98 @@ async def ai_evaluation_run(body: PortfolioEvaluateRequest, db: db_dependency):
         ) from e
 
 
+@router.post("/portfolio/import_and_evaluate", response_model=PortfolioEvaluateResponse)
+async def import_and_evaluate(
+    db: db_dependency,
+    file: UploadFile = File(...),
+    rubric_id: int = Form(...),
+    user_id: int = Form(...),
+    skill_evaluation_id: Optional[int] = Form(
+        None, description="Refresh this SkillEvaluation (see PortfolioEvaluateRequest)."
+    ),
+    portfolio_id: Optional[int] = Form(
+        None,
+        description="Existing portfolio this upload revises; its unchanged pages are reused.",
+    ),
+    matcher: Optional[str] = Form(
+        None, description="Criteria matcher (see PortfolioEvaluateRequest.matcher)."
+    ),
+):
+    """
+    /portfolio/import and /ai_evaluation/run in one request.
+
+    Text extraction starts immediately; the rubric snapshot and criteria are loaded
+    while it runs, and matching begins as soon as the text is ready. The file is
+    stored with the portfolio without a round trip through the client.
+    """
+    if not file.filename or not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Please upload a PDF file (.pdf)",
+        )
+    revised_portfolio_id = portfolio_id
+    if revised_portfolio_id is None and skill_evaluation_id is not None:
+        revised_portfolio_id = (
+            db.query(models.SkillEvaluation.portfolio_id)
+            .filter(models.SkillEvaluation.id == skill_evaluation_id)
+            .scalar()
+        )
+    known_pages = (
+        _known_pages_for_portfolio(db, revised_portfolio_id)
+        if revised_portfolio_id is not None
+        else None
+    )
+
+    try:
+        match_service = get_matcher(matcher)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    openai_service = get_openai_service()
+    extraction = asyncio.create_task(
+        openai_service.extract_text_from_pdf(file, known_pages=known_pages)
+    )
+    try:
+        try:
+            prepared = await asyncio.to_thread(
+                prepare_portfolio_ai_evaluation,
+                db,
+                rubric_id=rubric_id,
+                user_id=user_id,
+                filename=file.filename,
+                skill_evaluation_id=skill_evaluation_id,
+                portfolio_id=portfolio_id,
+                matcher=matcher_name(match_service),
+            )
+            extracted = await extraction
+        except BaseException:
+            extraction.cancel()
+            await asyncio.gather(extraction, return_exceptions=True)
+            db.rollback()
+            raise
+        result = await complete_portfolio_ai_evaluation(
+            db,
+            prepared,
+            text=extracted["text"],
+            file_token=extracted["file_token"],
+            openai_service=match_service,
+            pages=extracted["pages"],
+        )
+        return _portfolio_evaluate_response_from_result(result)
+    except ValueError as e:
+        logger.error("Validation error: %s", e)
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except OCRPoolBusyError as e:
+        logger.warning("OCR pool saturated: %s", e)
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        ) from e
+    except Exception as e:
+        logger.error("Error during import and evaluation: %s", e)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to import and evaluate: {str(e)}"
+        ) from e
+
+
 def _get_skill_evaluation_or_404(
     db: Session, skill_evaluation_id: int
 ) -> models.SkillEvaluation:
@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+
+from services.extraction_cache import get_extraction_cache
+from services.llm_cache import get_llm_cache
+from services.match_routing import match_tier_stats
+from services.ocr_pool import get_ocr_pool
+from services.openai_service import get_openai_service
+from services.pdf_extraction import extraction_pool_restarts, extraction_tier_stats
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics/ocr")
+async def read_ocr_metrics():
+    """Queue depth and job counters of the OCR worker pool, plus worker-pool restarts."""
+    return {**get_ocr_pool().stats(), "extraction_pool_restarts": extraction_pool_restarts()}
+
+
+@router.get("/metrics/extraction_cache")
+async def read_extraction_cache_metrics():
+    """Hit/miss/eviction counters of the PDF extraction cache."""
+    return get_extraction_cache().stats()
+
+
+@router.get("/metrics/extraction_tiers")
+async def read_extraction_tier_metrics():
+    """Per-tier hit rate and latency of the PDF extractor chain (this worker process)."""
+    return extraction_tier_stats.stats()
+
+
+@router.get("/metrics/llm")
+async def read_llm_metrics():
+    """In-flight/waiting LLM calls, retries and client-side rate limiter state."""
+    return get_openai_service().llm_stats()
+
+
+@router.get("/metrics/match_tiers")
+async def read_match_tier_metrics():
+    """Per-model runs, escalations and latency of cascaded criteria matching (this worker process)."""
+    return match_tier_stats.stats()
+
+
+@router.get("/metrics/llm_cache")
+async def read_llm_cache_metrics():
+    """Hit/miss/eviction counters of the LLM response cache."""
+    return get_llm_cache().stats()
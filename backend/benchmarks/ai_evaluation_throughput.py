@@ -0,0 +1,108 @@
+"""
+Throughput and latency of POST /ai_evaluation/run against a running backend.
+
+Start the server with the LLM simulator (services.llm_simulator) so the run is cheap and
+repeatable, e.g.:
+    OPENAI_SIMULATOR=simulate OPENAI_SIM_LATENCY_MS=lognormal:800,0.5 OPENAI_SIM_SEED=1 \\
+        uvicorn main:app --port 8000
+or OPENAI_SIMULATOR=replay with cassettes recorded earlier by OPENAI_SIMULATOR=record.
+
+Usage (from backend/):
+    python -m benchmarks.ai_evaluation_throughput --rubric-id 1 --user-id 1 \\
+        [--base-url http://localhost:8000] [--requests 200] [--concurrency 20] \\
+        [--text-file portfolio.txt] [--matcher openai] [--repeat-text]
+
+Every request gets a distinct text (a numbered suffix) so the LLM response cache does not
+short-circuit the run; --repeat-text sends the same text each time to measure cache hits.
+Reports requests/s, latency percentiles, status counts and the server's /metrics/llm.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+DEFAULT_TEXT = (
+    "Led a team of four students to build a Flask web application backed by PostgreSQL. "
+    "Designed the schema, wrote unit tests with pytest and deployed the service with Docker. "
+    "Presented the project to faculty and wrote the technical documentation."
+)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _run(args) -> None:
+    text = Path(args.text_file).read_text(encoding="utf-8") if args.text_file else DEFAULT_TEXT
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+
+        async def one(n: int) -> None:
+            body = {
+                "text": text if args.repeat_text else f"{text}\n\n[benchmark request {n}]",
+                "rubric_id": args.rubric_id,
+                "user_id": args.user_id,
+                "filename": f"benchmark_{n}.txt",
+                "matcher": args.matcher,
+            }
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/ai_evaluation/run", json=body)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        try:
+            llm_metrics = (await client.get("/metrics/llm")).json()
+        except (httpx.HTTPError, ValueError):
+            llm_metrics = None
+
+    print(f"requests:     {args.requests} at concurrency {args.concurrency}")
+    print(f"elapsed:      {elapsed:.2f}s  ({args.requests / elapsed:.2f} req/s)")
+    print(
+        "latency:      p50 {:.3f}s  p95 {:.3f}s  p99 {:.3f}s  mean {:.3f}s".format(
+            _percentile(latencies, 0.50),
+            _percentile(latencies, 0.95),
+            _percentile(latencies, 0.99),
+            statistics.fmean(latencies),
+        )
+    )
+    print(f"statuses:     {dict(statuses)}")
+    if llm_metrics is not None:
+        print("server /metrics/llm:")
+        print(json.dumps(llm_metrics, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rubric-id", type=int, required=True)
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--text-file")
+    parser.add_argument("--matcher")
+    parser.add_argument("--repeat-text", action="store_true")
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
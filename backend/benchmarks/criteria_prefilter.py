@@ -0,0 +1,118 @@
+"""
+Recall vs prompt size of the TF-IDF criteria prefilter (services.criteria_prefilter).
+
+Usage (from backend/):
+    python -m benchmarks.criteria_prefilter [--cases cases.json] [--top-k 1 2 3] [--margin 0.8]
+
+cases.json is a list of labelled evaluations:
+    [{"text": "...", "criteria": [criteria payload dicts], "expected": [criteria_history_id, ...]}]
+where "expected" are the criteria a full (unfiltered) LLM run matched. Without --cases a
+synthetic rubric and portfolio set is generated. Synthetic portfolios reuse the criteria
+vocabulary, so their recall is an upper bound; judge the prefilter on real labelled
+cases (including Thai portfolios) before enabling it.
+
+Reports, per top-K: share of criteria sent to the LLM, estimated criteria-table tokens,
+recall of expected criteria and of expected skills, and scoring time per evaluation.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.criteria_prefilter import prefilter_criteria  # noqa: E402
+from services.match_prompt import compile_criteria  # noqa: E402
+from services.text_chunks import estimate_text_tokens  # noqa: E402
+
+SKILL_TOPICS = [
+    ("python", "scripts automation pandas flask"),
+    ("database", "sql schema normalization postgres queries"),
+    ("teamwork", "team collaboration meetings roles conflict"),
+    ("leadership", "lead mentor coordinate delegate vision"),
+    ("frontend", "react css layout components accessibility"),
+    ("testing", "unit tests coverage pytest regression"),
+    ("cloud", "aws deployment docker containers kubernetes"),
+    ("statistics", "regression hypothesis sampling variance inference"),
+    ("writing", "report documentation technical audience clarity"),
+    ("security", "authentication encryption vulnerabilities owasp threats"),
+]
+LEVEL_PHRASES = ["describes basic", "applies", "designs and evaluates", "innovates and teaches"]
+FILLER = "semester course activity club volunteer internship project presentation campus".split()
+
+
+def _synthetic_cases(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    criteria = []
+    for s, (name, words) in enumerate(SKILL_TOPICS):
+        for lv, phrase in enumerate(LEVEL_PHRASES):
+            criteria.append(
+                {
+                    "criteria_history_id": s * 10 + lv,
+                    "rubric_skill_history_id": s,
+                    "level_history_id": lv,
+                    "description": f"{phrase} {name} work involving {words}",
+                }
+            )
+    cases = []
+    for _ in range(n):
+        shown = rng.sample(range(len(SKILL_TOPICS)), k=rng.randint(2, 5))
+        parts, expected = [], []
+        for s in shown:
+            lv = rng.randrange(len(LEVEL_PHRASES))
+            name, words = SKILL_TOPICS[s]
+            mentioned = " ".join(rng.sample(words.split(), k=2))
+            parts.append(f"I {LEVEL_PHRASES[lv]} {name} using {mentioned}.")
+            expected.append(s * 10 + lv)
+        parts += [" ".join(rng.choices(FILLER, k=30)) for _ in range(5)]
+        rng.shuffle(parts)
+        cases.append({"text": " ".join(parts), "criteria": criteria, "expected": expected})
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=Path, help="labelled cases JSON (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=200, help="number of synthetic cases")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[0, 1, 2, 3])
+    parser.add_argument("--margin", type=float, default=0.8)
+    parser.add_argument("--min-score", type=float, default=0.02)
+    args = parser.parse_args()
+
+    cases = json.loads(args.cases.read_text()) if args.cases else _synthetic_cases(args.synthetic)
+
+    print(f"{len(cases)} cases")
+    print(f"{'top_k':>6}{'kept':>8}{'table tok':>11}{'recall':>9}{'skill rec':>11}{'ms/eval':>9}")
+    for top_k in args.top_k:
+        kept = total = tokens = hits = expected_n = skill_hits = skill_n = 0
+        seconds = 0.0
+        for case in cases:
+            criteria = case["criteria"]
+            start = time.perf_counter()
+            chosen = prefilter_criteria(case["text"], criteria, top_k, args.margin, args.min_score)
+            seconds += time.perf_counter() - start
+            kept += len(chosen)
+            total += len(criteria)
+            tokens += estimate_text_tokens(compile_criteria(chosen).table)
+            chosen_ids = {c["criteria_history_id"] for c in chosen}
+            chosen_skills = {c["rubric_skill_history_id"] for c in chosen}
+            skill_of = {c["criteria_history_id"]: c["rubric_skill_history_id"] for c in criteria}
+            hits += sum(1 for e in case["expected"] if e in chosen_ids)
+            expected_n += len(case["expected"])
+            expected_skills = {skill_of[e] for e in case["expected"] if e in skill_of}
+            skill_hits += len(expected_skills & chosen_skills)
+            skill_n += len(expected_skills)
+        label = "off" if top_k <= 0 else str(top_k)
+        print(
+            f"{label:>6}{kept / total:>8.0%}{tokens / len(cases):>11.0f}"
+            f"{hits / max(1, expected_n):>9.1%}{skill_hits / max(1, skill_n):>11.1%}"
+            f"{seconds / len(cases) * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare PDF text extractor tiers on a corpus of sample portfolios.
+
+Usage (from backend/):
+    python -m benchmarks.extraction_tiers path/to/pdfs [--min-chars 30] [--ocr]
+
+For every tier it reports wall time, pages per second and the share of pages that pass
+the quality check (the tier's hit rate). The "chain" row runs the tiers in order and
+only escalates failing pages, as OpenAIService does.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.pdf_extraction import _page_ranges, count_pages, extract_page_range, page_text_ok  # noqa: E402
+
+
+def _ocr_pages(pdf_path: str, pages: list[int]) -> dict[int, str]:
+    from services.ocr_pool import ocr_page
+
+    return {n: ocr_page(pdf_path, n, 300) for n in pages}
+
+
+def _run_tier(tier: str, pdf_path: str, pages: list[int]) -> dict[int, str]:
+    if tier == "ocr":
+        return _ocr_pages(pdf_path, pages)
+    out = {}
+    for start, stop in _page_ranges(pages):
+        out.update(zip(range(start, stop), extract_page_range(pdf_path, start, stop, tier)))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, help="directory containing sample PDFs")
+    parser.add_argument("--min-chars", type=int, default=30, help="OCR_MIN_PAGE_CHARS used by page_text_ok")
+    parser.add_argument("--ocr", action="store_true", help="include the OCR tier (needs tesseract + poppler)")
+    args = parser.parse_args()
+
+    pdfs = sorted(args.corpus.glob("**/*.pdf"))
+    if not pdfs:
+        parser.error(f"no PDFs found under {args.corpus}")
+    tiers = ["pypdf", "pdfplumber"] + (["ocr"] if args.ocr else [])
+
+    totals = {t: {"seconds": 0.0, "pages": 0, "ok": 0} for t in tiers + ["chain"]}
+    for pdf in pdfs:
+        path = str(pdf)
+        try:
+            pages = list(range(count_pages(path)))
+        except Exception as e:
+            print(f"skip {pdf.name}: {e}")
+            continue
+        for tier in tiers:
+            start = time.perf_counter()
+            texts = _run_tier(tier, path, pages)
+            totals[tier]["seconds"] += time.perf_counter() - start
+            totals[tier]["pages"] += len(pages)
+            totals[tier]["ok"] += sum(page_text_ok(t, args.min_chars) for t in texts.values())
+
+        start = time.perf_counter()
+        pending = pages
+        for tier in tiers:
+            if not pending:
+                break
+            texts = _run_tier(tier, path, pending)
+            pending = [n for n in pending if not page_text_ok(texts[n], args.min_chars)]
+        totals["chain"]["seconds"] += time.perf_counter() - start
+        totals["chain"]["pages"] += len(pages)
+        totals["chain"]["ok"] += len(pages) - len(pending)
+
+    print(f"{len(pdfs)} PDFs")
+    print(f"{'tier':<12}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'hit rate':>10}")
+    for tier, t in totals.items():
+        rate = t["pages"] / t["seconds"] if t["seconds"] else float("inf")
+        hit = t["ok"] / t["pages"] if t["pages"] else 0.0
+        print(f"{tier:<12}{t['pages']:>8}{t['seconds']:>10.2f}{rate:>10.1f}{hit:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Estimate matching-prompt tokens: the old verbose prompt vs the compact one.
+
+Usage (from backend/):
+    python -m benchmarks.match_prompt_tokens [--skills 8] [--levels 4] [--text-chars 20000]
+
+Builds a synthetic rubric snapshot and portfolio, then reports estimated input tokens
+per request and per evaluation, and the output tokens the model is allowed to spend.
+Token counts use the same chars/token estimate as the rate limiter.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.match_prompt import compile_criteria  # noqa: E402
+from services.text_chunks import estimate_text_tokens, split_text  # noqa: E402
+
+LEGACY_TEXT_CHARS = 4000
+LEGACY_MAX_TOKENS = 1500
+LEGACY_MATCH_CHUNK_TOKENS = 1500
+
+
+def _legacy_prompt(criteria: list[dict], text: str) -> str:
+    # Shape of the prompt before services.match_prompt (criteria as indented JSON).
+    return (
+        "You are an assistant that matches portfolio content of text and implication with passing "
+        "rubric criteria. Output valid JSON only.\n"
+        "Given the portfolio text and a list of rubric criteria, find which parts of the text or "
+        "extracted skills match each criteria.\nReturn a JSON object with keys: \n"
+        "  - classification: { skills: [...], categories: [...], summary: '...' }\n"
+        "  - matches: an array of objects with keys: criteria_history_id, rubric_skill_history_id, "
+        "level_history_id, matched_text, confidence (0-1), matched_from\n"
+        "If multiple criteria match the same text, include multiple objects. If nothing matches, "
+        "return an object with empty arrays.\n\n"
+        f"Classification hint (if available):\n{json.dumps({}, indent=2)}\n\n"
+        f"Criteria list:\n{json.dumps(criteria, ensure_ascii=False, indent=2)}\n\n"
+        f"Portfolio text (full):\n{text}\n\n"
+        "Notes:\n- matched_text should be the exact snippet from the portfolio text when possible, "
+        "else a short paraphrase.\n- confidence should be a number between 0 and 1.\n"
+        "- matched_from should indicate which extracted skill or 'text' if matched from free text.\n"
+        "Only output valid JSON (an object). Do not include extra commentary."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skills", type=int, default=8)
+    parser.add_argument("--levels", type=int, default=4)
+    parser.add_argument("--text-chars", type=int, default=20000)
+    args = parser.parse_args()
+
+    criteria = [
+        {
+            "criteria_history_id": 1000 + s * args.levels + lv,
+            "rubric_skill_history_id": 200 + s,
+            "level_history_id": 300 + lv,
+            "description": f"Level {lv + 1} of skill {s + 1}: demonstrates the competency in a "
+            "graded project with measurable outcomes and written reflection",
+        }
+        for s in range(args.skills)
+        for lv in range(args.levels)
+    ]
+    text = " ".join(f"Paragraph {i} describing coursework and projects." for i in range(10**6))
+    text = text[: args.text_chars]
+
+    legacy_chunks = split_text(text, LEGACY_MATCH_CHUNK_TOKENS, 100)
+    legacy_in = sum(estimate_text_tokens(_legacy_prompt(criteria, c)) for c in legacy_chunks)
+    legacy_truncated_in = estimate_text_tokens(_legacy_prompt(criteria, text[:LEGACY_TEXT_CHARS]))
+
+    compiled = compile_criteria(criteria)
+    chunk_tokens = compiled.text_token_allowance(LEGACY_MATCH_CHUNK_TOKENS, {})
+    chunks = split_text(text, chunk_tokens, 100)
+    compact_in = sum(
+        estimate_text_tokens("".join(m["content"] for m in compiled.messages(c, {}, "part")))
+        for c in chunks
+    )
+    static = estimate_text_tokens(compiled.static_prompt)
+
+    print(f"criteria: {len(criteria)}, text: {len(text)} chars")
+    print(f"{'prompt':<26}{'requests':>10}{'input tok':>12}{'max output tok':>16}")
+    print(f"{'legacy, text[:4000]':<26}{1:>10}{legacy_truncated_in:>12}{LEGACY_MAX_TOKENS:>16}")
+    print(f"{'legacy, full text':<26}{len(legacy_chunks):>10}{legacy_in:>12}{LEGACY_MAX_TOKENS * len(legacy_chunks):>16}")
+    print(f"{'compact, full text':<26}{len(chunks):>10}{compact_in:>12}{compiled.max_output_tokens() * len(chunks):>16}")
+    print(f"compact static prefix (cacheable): {static} tokens per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, ForeignKey, JSON, Float, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, ForeignKey, JSON, Float, Boolean, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 
 class User(Base):
     __tablename__ = 'user'
@@ -110,11 +110,28 @@ class Portfolio(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String)
-    classification_json = Column(JSON)  # {"skills": [], "categories": [], "summary": ""}
+    # Deferred: only loaded when accessed or undeferred, so listing/reading portfolios stays cheap.
+    classification_json = deferred(Column(JSON))  # {"skills": [], "categories": [], "summary": ""}
     created_at = Column(DateTime)
+    file_sha256 = Column(String(64), index=True, nullable=True)  # key of the uploaded PDF in services.blob_store
+    file_size = Column(Integer, nullable=True)
+    text_compressed = deferred(Column(LargeBinary, nullable=True))  # extracted text, see services.portfolio_text
     
     ai_evaluated_skills = relationship("AIEvaluatedSkill", back_populates="portfolio", cascade="all,delete-orphan")
     skill_evaluations = relationship("SkillEvaluation", back_populates="portfolio", cascade="all,delete-orphan")
+    pages = relationship("PortfolioPage", back_populates="portfolio", cascade="all,delete-orphan", order_by="PortfolioPage.page_number")
+
+class PortfolioPage(Base):
+    # Extracted text per page of the stored portfolio file, keyed by a content fingerprint so a revised upload only re-extracts changed pages.
+    __tablename__ = 'portfolio_page'
+
+    id = Column(Integer, primary_key=True, index=True)
+    portfolio_id = Column(Integer, ForeignKey('portfolio.id', ondelete='CASCADE'), index=True)
+    page_number = Column(Integer)  # 0-based
+    fingerprint = Column(String, index=True)  # sha256 of page content, see services.pdf_extraction.page_fingerprints
+    text = Column(String)
+
+    portfolio = relationship("Portfolio", back_populates="pages")
 
 class SkillEvaluation(Base):
     __tablename__ = 'skill_evaluation'
@@ -143,6 +160,7 @@ class AIEvaluatedSkill(Base):
     criteria_passing_description = Column(String)  # store the text which is used to determine the passing of the criteria, for future proof and explanation.
     skill_name = Column(String)
     level_rank = Column(Integer)
+    matcher = Column(String, nullable=True)  # criteria matcher that produced the row, see services.matchers
     
     rubric_score_history = relationship("RubricScoreHistory", back_populates="ai_evaluated_skills")
     portfolio = relationship("Portfolio", back_populates="ai_evaluated_skills")
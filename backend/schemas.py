@@ -61,9 +61,15 @@ class PortfolioBase(BaseModel):
     classification_json: dict[str, Any]
 
 
-class PortfolioModel(PortfolioBase):
+class PortfolioModel(BaseModel):
     id: int
+    filename: str
     created_at: datetime
+    file_sha256: Optional[str] = None
+    file_size: Optional[int] = None
+    # Heavy fields, only present when requested via ?include=
+    classification_json: Optional[dict[str, Any]] = None
+    text: Optional[str] = None
 
 
 class AIEvaluatedSkillBase(BaseModel):
@@ -96,11 +102,24 @@ class AIEvaluatedSkillPlaceholderUpdate(BaseModel):
 class PortfolioEvaluateRequest(BaseModel):
     """Body for running AI rubric matching against portfolio text."""
 
-    text: str = Field(..., min_length=1, description="Full portfolio text to evaluate")
+    text: Optional[str] = Field(
+        None,
+        min_length=1,
+        description=(
+            "Full portfolio text to evaluate; stored with the portfolio. May be omitted when "
+            "skill_evaluation_id or portfolio_id is set to reuse the stored text."
+        ),
+    )
     rubric_id: int
     user_id: int
     filename: Optional[str] = None
-    file_token: Optional[str] = None
+    file_token: Optional[str] = Field(
+        None,
+        description=(
+            "Opaque token returned by /portfolio/import; the staged file is stored with the "
+            "portfolio. A base64-encoded file is still accepted from older clients."
+        ),
+    )
     skill_evaluation_id: Optional[int] = Field(
         None,
         description=(
@@ -110,6 +129,21 @@ class PortfolioEvaluateRequest(BaseModel):
             "snapshot for that rubric."
         ),
     )
+    portfolio_id: Optional[int] = Field(
+        None,
+        description=(
+            "Evaluate an existing portfolio (new SkillEvaluation) instead of creating one; "
+            "its stored text is used when text is omitted."
+        ),
+    )
+    matcher: Optional[str] = Field(
+        None,
+        description=(
+            "Criteria matcher: 'openai' (LLM) or 'lexical' (instant offline preview). "
+            "Defaults to EVALUATION_MATCHER. A lexical preview cannot refresh a "
+            "skill_evaluation_id holding LLM results, nor replace an LLM classification."
+        ),
+    )
 
 
 class AIEvaluationItemResponse(BaseModel):
@@ -138,6 +172,10 @@ class PortfolioEvaluateResponse(BaseModel):
     rubric_score_history_id: int
     classification: dict[str, Any]
     evaluations: list[AIEvaluationItemResponse]
+    # Skills whose matching failed; they have no evaluation row (re-run to complete them)
+    failed_skills: list[str] = []
+    # Matcher that produced the evaluations ('lexical' results are a preview)
+    matcher: str = "openai"
 
 
 class StudentEvaluatedSkillBase(BaseModel):
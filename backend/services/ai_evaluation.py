@@ -1,19 +1,27 @@
 """
 AI rubric matching + persistence (Portfolio, RubricScoreHistory, SkillEvaluation, AIEvaluatedSkill).
 
-Criteria rows come from CriteriaHistory (snapshot). One AIEvaluatedSkill per RubricSkillHistory.
+Criteria rows come from CriteriaHistory (snapshot). One AIEvaluatedSkill per RubricSkillHistory,
+except skills whose matching failed without a match; those are reported, not stored as level 0.
 """
 from __future__ import annotations
 
+import asyncio
+import base64
 import logging
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Protocol
 
 from sqlalchemy.orm import Session, joinedload
 
 import models
+from services.blob_store import put_bytes, put_file
+from services.criteria_prefilter import prefilter_criteria
+from services.extraction_cache import extraction_cache_key, get_extraction_cache
+from services.file_staging import claim_staged_file, is_staging_token
+from services.portfolio_text import compress_text, decompress_text
 from services.rubric_snapshot import (
     apply_time_based_expiry_on_history,
     update_active_histories_for_rubric,
@@ -30,6 +38,16 @@ class OpenAIMatchProtocol(Protocol):
     ) -> dict | list: ...
 
 
+# Matchers (see services.matchers) whose results are previews: they never replace AI rows
+# or a portfolio classification produced by an LLM matcher
+PREVIEW_MATCHERS = frozenset({"lexical"})
+
+
+def matcher_name(service: OpenAIMatchProtocol) -> str:
+    """Registry name of a matcher instance; one without a ``name`` counts as the LLM."""
+    return getattr(service, "name", "openai")
+
+
 @dataclass
 class AIEvaluationPersistedRow:
     id: int
@@ -51,6 +69,9 @@ class PortfolioAIEvaluationResult:
     rubric_score_history_id: int
     classification: dict[str, Any]
     evaluations: list[AIEvaluationPersistedRow]
+    # Names of rubric skills whose matching requests failed; partial result
+    failed_skills: list[str] = field(default_factory=list)
+    matcher: str = "openai"
 
 
 def _default_classification() -> dict[str, Any]:
@@ -65,6 +86,12 @@ def _normalize_match_result(match_result: dict | list) -> tuple[dict[str, Any],
     return _default_classification(), match_result
 
 
+def _failed_skill_ids(match_result: dict | list) -> set[int]:
+    if not isinstance(match_result, dict):
+        return set()
+    return {sid for sid in map(_safe_int, match_result.get("failed_skills") or []) if sid is not None}
+
+
 def _safe_int(value: Any) -> int | None:
     if value is None:
         return None
@@ -83,6 +110,87 @@ def _safe_float(value: Any) -> float | None:
         return None
 
 
+def _put_file_token(file_token: str) -> tuple[str, int]:
+    """
+    Move the file behind ``file_token`` into the blob store.
+
+    file_token is a staging token from /portfolio/import, consumed here; older clients
+    may still send the base64 file itself. Returns (sha256, size).
+    """
+    if is_staging_token(file_token):
+        with claim_staged_file(file_token) as staged:
+            return put_file(staged.path, staged.sha256), staged.size
+    try:
+        file_bytes = base64.b64decode(file_token, validate=True)
+    except Exception as e:
+        raise ValueError("file_token is neither a staging token nor a base64 payload") from e
+    return put_bytes(file_bytes), len(file_bytes)
+
+
+def _pages_for_file(file_sha256: str) -> list[dict[str, Any]] | None:
+    """Per-page fingerprints/text for a stored file, if the extraction cache still has them."""
+    cached = get_extraction_cache().get(extraction_cache_key(file_sha256))
+    if not cached or not cached.get("fingerprints"):
+        return None
+    return [
+        {"fingerprint": fp, "text": t}
+        for fp, t in zip(cached["fingerprints"], cached["pages"])
+    ]
+
+
+def _replace_portfolio_pages(
+    portfolio: models.Portfolio, pages: list[dict[str, Any]] | None
+) -> None:
+    if pages is None:
+        return
+    portfolio.pages = [
+        models.PortfolioPage(page_number=n, fingerprint=p["fingerprint"], text=p["text"])
+        for n, p in enumerate(pages)
+    ]
+
+
+def _store_portfolio_file(
+    portfolio: models.Portfolio, file_token: str, pages: list[dict[str, Any]] | None
+) -> None:
+    """Put the file in the blob store and point the portfolio (and its pages) at it."""
+    portfolio.file_sha256, portfolio.file_size = _put_file_token(file_token)
+    if isinstance(portfolio.classification_json, dict) and "__file_token" in portfolio.classification_json:
+        # Legacy inline copy from before the blob store; the blob supersedes it.
+        portfolio.classification_json = {
+            k: v for k, v in portfolio.classification_json.items() if k != "__file_token"
+        }
+    _replace_portfolio_pages(portfolio, pages if pages is not None else _pages_for_file(portfolio.file_sha256))
+
+
+def _stored_portfolio_text(db: Session, portfolio: models.Portfolio) -> str | None:
+    """Text saved by a previous evaluation; falls back to the stored pages for older rows."""
+    text = decompress_text(portfolio.text_compressed)
+    if text is None:
+        rows = (
+            db.query(models.PortfolioPage.text)
+            .filter(models.PortfolioPage.portfolio_id == portfolio.id)
+            .order_by(models.PortfolioPage.page_number)
+            .all()
+        )
+        text = "\n\n".join(t or "" for (t,) in rows).strip()
+    return text or None
+
+
+def _get_portfolio_for_user(db: Session, portfolio_id: int, user_id: int) -> models.Portfolio:
+    portfolio = db.query(models.Portfolio).filter(models.Portfolio.id == portfolio_id).first()
+    if not portfolio:
+        raise ValueError(f"portfolio_id {portfolio_id} not found")
+    owners = {
+        uid
+        for (uid,) in db.query(models.SkillEvaluation.user_id)
+        .filter(models.SkillEvaluation.portfolio_id == portfolio_id)
+        .distinct()
+    }
+    if owners and user_id not in owners:
+        raise ValueError("portfolio does not belong to this user_id")
+    return portfolio
+
+
 def _group_matches_by_rubric_skill_history(matches: list) -> dict[int, list[dict[str, Any]]]:
     by_skill: dict[int, list[dict[str, Any]]] = defaultdict(list)
     for m in matches:
@@ -103,13 +211,22 @@ def _build_ai_rows_per_snapshot_skill(
     skill_evaluation_id: int,
     rubric_history_id: int,
     portfolio_id: int,
+    failed_skill_ids: set[int] | None = None,
+    matcher: str = "openai",
 ) -> tuple[list[models.AIEvaluatedSkill], list[dict[str, Any]]]:
+    """
+    failed_skill_ids: skills whose matching requests failed; without a match they get no
+    row rather than a level 0 that would read as a genuine miss.
+    matcher: name of the matcher that produced ``matches``, recorded on every row.
+    """
     by_skill = _group_matches_by_rubric_skill_history(matches)
     eval_rows: list[models.AIEvaluatedSkill] = []
     match_extras: list[dict[str, Any]] = []
 
     for sh in rubric_skill_histories:
         cands = by_skill.get(sh.id, [])
+        if not cands and sh.id in (failed_skill_ids or ()):
+            continue
         if not cands:
             eval_rows.append(
                 models.AIEvaluatedSkill(
@@ -119,6 +236,7 @@ def _build_ai_rows_per_snapshot_skill(
                     criteria_passing_description=None,
                     skill_name=sh.name,
                     level_rank=0,
+                    matcher=matcher,
                 )
             )
             match_extras.append(
@@ -157,6 +275,7 @@ def _build_ai_rows_per_snapshot_skill(
                 criteria_passing_description=desc,
                 skill_name=sh.name,
                 level_rank=level_rank,
+                matcher=matcher,
             )
         )
         match_extras.append(
@@ -170,20 +289,36 @@ def _build_ai_rows_per_snapshot_skill(
     return eval_rows, match_extras
 
 
-async def run_portfolio_ai_evaluation(
+@dataclass
+class PreparedPortfolioEvaluation:
+    """DB state for one evaluation, loaded before the portfolio text is needed."""
+
+    portfolio: models.Portfolio
+    skill_evaluation: models.SkillEvaluation
+    rubric_history_id: int
+    rubric_skill_histories: list[models.RubricSkillHistory]
+    criteria_rows: list[models.CriteriaHistory]
+    criteria_payload: list[dict[str, Any]]
+
+
+def prepare_portfolio_ai_evaluation(
     db: Session,
     *,
-    text: str,
     rubric_id: int,
     user_id: int,
     filename: str | None,
-    file_token: str | None,
-    openai_service: OpenAIMatchProtocol,
     skill_evaluation_id: int | None = None,
-) -> PortfolioAIEvaluationResult:
-    if not text.strip():
-        raise ValueError("text is required for evaluation")
-
+    portfolio_id: int | None = None,
+    matcher: str = "openai",
+) -> PreparedPortfolioEvaluation:
+    """
+    Validate the request and load (or create) the portfolio, SkillEvaluation and rubric
+    snapshot criteria. Needs no text, so callers can run it while text is still being
+    extracted. Nothing is committed; complete_portfolio_ai_evaluation finishes the job.
+
+    matcher: name of the matcher that will run; a preview matcher (PREVIEW_MATCHERS) may
+    not refresh a SkillEvaluation that holds LLM rows.
+    """
     rubric = db.query(models.RubricScore).filter(models.RubricScore.id == rubric_id).first()
     if not rubric:
         raise ValueError(f"rubric_id {rubric_id} does not exist")
@@ -202,15 +337,17 @@ async def run_portfolio_ai_evaluation(
                 "Create or update the rubric to generate one."
             )
 
-        initial_classification = _default_classification()
-        if file_token:
-            initial_classification["__file_token"] = file_token
-        db_portfolio = models.Portfolio(
-            filename=filename or "text_portfolio",
-            classification_json=initial_classification,
-            created_at=now,
-        )
-        db.add(db_portfolio)
+        if portfolio_id is not None:
+            db_portfolio = _get_portfolio_for_user(db, portfolio_id, user_id)
+            if filename:
+                db_portfolio.filename = filename
+        else:
+            db_portfolio = models.Portfolio(
+                filename=filename or "text_portfolio",
+                classification_json=_default_classification(),
+                created_at=now,
+            )
+            db.add(db_portfolio)
         db.flush()
 
         skill_evaluation = models.SkillEvaluation(
@@ -240,17 +377,11 @@ async def run_portfolio_ai_evaluation(
         )
         if not db_portfolio:
             raise ValueError("portfolio for skill_evaluation not found")
+        if portfolio_id is not None and portfolio_id != db_portfolio.id:
+            raise ValueError("portfolio_id does not match the skill_evaluation's portfolio")
 
         if filename:
             db_portfolio.filename = filename
-        if file_token:
-            existing = (
-                db_portfolio.classification_json
-                if isinstance(db_portfolio.classification_json, dict)
-                else {}
-            )
-            existing["__file_token"] = file_token
-            db_portfolio.classification_json = existing
 
         prev_hist = skill_evaluation.rubric_score_history
         if prev_hist is None:
@@ -274,6 +405,19 @@ async def run_portfolio_ai_evaluation(
                 "start a new evaluation or switch rubric_id to an active version."
             )
 
+        if matcher in PREVIEW_MATCHERS:
+            existing_matchers = {
+                m or "openai"
+                for (m,) in db.query(models.AIEvaluatedSkill.matcher)
+                .filter(models.AIEvaluatedSkill.skill_evaluation_id == skill_evaluation.id)
+                .distinct()
+            }
+            if existing_matchers - PREVIEW_MATCHERS:
+                raise ValueError(
+                    f"skill_evaluation {skill_evaluation.id} holds LLM results; a {matcher} "
+                    "preview does not replace them. Omit skill_evaluation_id to preview."
+                )
+
         db.query(models.AIEvaluatedSkill).filter(
             models.AIEvaluatedSkill.skill_evaluation_id == skill_evaluation.id
         ).delete(synchronize_session=False)
@@ -354,12 +498,64 @@ async def run_portfolio_ai_evaluation(
             f"rubric snapshot {rubric_history_id} has no criteria with descriptions to match against"
         )
 
+    return PreparedPortfolioEvaluation(
+        portfolio=db_portfolio,
+        skill_evaluation=skill_evaluation,
+        rubric_history_id=rubric_history_id,
+        rubric_skill_histories=rubric_skill_histories,
+        criteria_rows=criteria_rows,
+        criteria_payload=criteria_payload,
+    )
+
+
+async def complete_portfolio_ai_evaluation(
+    db: Session,
+    prepared: PreparedPortfolioEvaluation,
+    *,
+    text: str | None,
+    file_token: str | None,
+    openai_service: OpenAIMatchProtocol,
+    pages: list[dict[str, Any]] | None = None,
+) -> PortfolioAIEvaluationResult:
+    """
+    Store text/file on the prepared portfolio, run matching and commit the AI rows.
+
+    The portfolio classification is replaced too, unless this is a preview matcher and
+    the current classification came from an LLM matcher.
+    """
+    matcher = matcher_name(openai_service)
+    db_portfolio = prepared.portfolio
+    skill_evaluation = prepared.skill_evaluation
+    rubric_history_id = prepared.rubric_history_id
+    criteria_rows = prepared.criteria_rows
+
+    if file_token:
+        _store_portfolio_file(db_portfolio, file_token, pages)
+    if text is None:
+        text = _stored_portfolio_text(db, db_portfolio)
+        if text is None:
+            raise ValueError(
+                f"no text is stored for portfolio_id {db_portfolio.id}; send text to evaluate"
+            )
+    else:
+        db_portfolio.text_compressed = compress_text(text)
+
+    # Trims criteria within each skill when CRITERIA_PREFILTER_TOP_K > 0; every skill is still matched.
+    criteria = await asyncio.to_thread(prefilter_criteria, text, prepared.criteria_payload)
+    logger.info(
+        "Criteria prefilter kept %d of %d criteria", len(criteria), len(prepared.criteria_payload)
+    )
     match_result = await openai_service.match_text_to_criteria(
-        text=text, classification={}, criteria=criteria_payload
+        text=text, classification={}, criteria=criteria
     )
     classification, matches = _normalize_match_result(match_result)
+    failed_skill_ids = _failed_skill_ids(match_result)
+    if failed_skill_ids:
+        logger.warning(
+            "Partial AI evaluation: matching failed for %d skills", len(failed_skill_ids)
+        )
 
-    # Preserve internal metadata keys (e.g. stored PDF token) across AI refresh.
+    # Preserve internal metadata keys (e.g. legacy stored PDF token) across AI refresh.
     existing_meta = (
         db_portfolio.classification_json
         if isinstance(db_portfolio.classification_json, dict)
@@ -370,8 +566,13 @@ async def run_portfolio_ai_evaluation(
         for k, v in existing_meta.items()
         if isinstance(k, str) and k.startswith("__")
     }
-    db_portfolio.classification_json = {**classification, **meta}
-    db.flush()
+    # Classifications stored before __matcher was recorded came from the LLM.
+    existing_from_llm = existing_meta.get("__matcher", "openai") not in PREVIEW_MATCHERS and any(
+        existing_meta.get(k) for k in _default_classification()
+    )
+    if matcher not in PREVIEW_MATCHERS or not existing_from_llm:
+        db_portfolio.classification_json = {**classification, **meta, "__matcher": matcher}
+        db.flush()
 
     crit_hist_by_id = {c.id: c for c in criteria_rows}
     level_hist_ids = {c.level_history_id for c in criteria_rows if c.level_history_id}
@@ -385,13 +586,15 @@ async def run_portfolio_ai_evaluation(
     level_hist_by_id = {lv.id: lv for lv in level_hist_rows}
 
     eval_rows, match_extras = _build_ai_rows_per_snapshot_skill(
-        rubric_skill_histories=rubric_skill_histories,
+        rubric_skill_histories=prepared.rubric_skill_histories,
         matches=matches,
         crit_hist_by_id=crit_hist_by_id,
         level_hist_by_id=level_hist_by_id,
         skill_evaluation_id=skill_evaluation.id,
         rubric_history_id=rubric_history_id,
         portfolio_id=db_portfolio.id,
+        failed_skill_ids=failed_skill_ids,
+        matcher=matcher,
     )
 
     try:
@@ -428,4 +631,54 @@ async def run_portfolio_ai_evaluation(
         rubric_score_history_id=rubric_history_id,
         classification=classification,
         evaluations=persisted,
+        failed_skills=[sh.name for sh in prepared.rubric_skill_histories if sh.id in failed_skill_ids],
+        matcher=matcher,
+    )
+
+
+async def run_portfolio_ai_evaluation(
+    db: Session,
+    *,
+    text: str | None,
+    rubric_id: int,
+    user_id: int,
+    filename: str | None,
+    file_token: str | None,
+    openai_service: OpenAIMatchProtocol,
+    skill_evaluation_id: int | None = None,
+    portfolio_id: int | None = None,
+    pages: list[dict[str, Any]] | None = None,
+) -> PortfolioAIEvaluationResult:
+    """
+    text: portfolio text to evaluate; stored (compressed) on the Portfolio. When omitted,
+    the text stored for the portfolio of skill_evaluation_id / portfolio_id is reused.
+    portfolio_id: start a new SkillEvaluation for this existing portfolio instead of
+    creating a new one (ignored when skill_evaluation_id is set, which must match it).
+    file_token: staging token from /portfolio/import (or, from older clients, the
+    base64 file); the file is stored in the blob store and referenced from
+    Portfolio.file_sha256.
+    pages: per-page {fingerprint, text} of the stored file; when omitted they are
+    looked up in the extraction cache.
+    """
+    if text is not None and not text.strip():
+        text = None
+    if text is None and skill_evaluation_id is None and portfolio_id is None:
+        raise ValueError("text is required unless skill_evaluation_id or portfolio_id is given")
+
+    prepared = prepare_portfolio_ai_evaluation(
+        db,
+        rubric_id=rubric_id,
+        user_id=user_id,
+        filename=filename,
+        skill_evaluation_id=skill_evaluation_id,
+        portfolio_id=portfolio_id,
+        matcher=matcher_name(openai_service),
+    )
+    return await complete_portfolio_ai_evaluation(
+        db,
+        prepared,
+        text=text,
+        file_token=file_token,
+        openai_service=openai_service,
+        pages=pages,
     )
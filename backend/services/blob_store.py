@@ -0,0 +1,78 @@
+"""
+Content-addressed blob store for portfolio files on the local filesystem.
+
+Blobs live at ``BLOB_STORE_DIR/<sha[:2]>/<sha[2:4]>/<sha>`` and are keyed by the SHA-256
+of their bytes, so identical uploads are stored once. Rows reference a blob by its hash.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Relative paths resolve against the backend directory, whatever the working directory
+BLOB_STORE_DIR = BACKEND_DIR / os.getenv("BLOB_STORE_DIR", "storage/blobs")
+
+
+def blob_path(sha256: str) -> Path:
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise ValueError(f"invalid blob hash: {sha256!r}")
+    return BLOB_STORE_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def blob_exists(sha256: str) -> bool:
+    return blob_path(sha256).is_file()
+
+
+def put_bytes(data: bytes) -> str:
+    """Store ``data`` (deduplicated) and return its SHA-256 hex digest."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    dest = blob_path(sha256)
+    if dest.is_file():
+        return sha256
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        # Concurrent writers of the same hash produce identical bytes, so last rename wins.
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return sha256
+
+
+def put_file(src_path: str | os.PathLike, sha256: str) -> str:
+    """
+    Add an on-disk file whose SHA-256 is already known to the store.
+
+    Hard-links when source and store share a filesystem (no data copied), else copies.
+    """
+    dest = blob_path(sha256)
+    if dest.is_file():
+        return sha256
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f"{sha256}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+    try:
+        try:
+            os.link(src_path, tmp)
+        except OSError:
+            shutil.copyfile(src_path, tmp)
+        # Concurrent writers of the same hash produce identical bytes, so last rename wins.
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return sha256
+
+
+def read_bytes(sha256: str) -> bytes:
+    return blob_path(sha256).read_bytes()
+
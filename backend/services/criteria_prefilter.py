@@ -0,0 +1,122 @@
+"""
+Local TF-IDF prefilter that trims rubric criteria before LLM matching.
+
+Criteria descriptions are the documents and the portfolio text is the query. Both become
+log-scaled, IDF-weighted, L2-normalised term vectors (NumPy), and each criterion is
+scored by cosine similarity. Per rubric skill only the top CRITERIA_PREFILTER_TOP_K
+criteria are kept, plus any within CRITERIA_PREFILTER_MARGIN of the K-th score.
+
+Only criteria within a skill are trimmed; every skill still reaches the LLM. A skill
+whose best criterion scores below CRITERIA_PREFILTER_MIN_SCORE has no usable lexical
+signal (e.g. a Thai portfolio against English criteria, or a paraphrase), so all of its
+criteria are kept and the LLM matches them semantically.
+
+Opt-in (CRITERIA_PREFILTER_TOP_K=0 by default). K=3 keeps every expected criterion on the
+synthetic benchmark, but synthetic portfolios reuse the criteria wording, so that recall
+is an upper bound; enable it once the benchmark's --cases run on real labelled portfolios
+(Thai and paraphrased ones included) shows the same.
+
+Terms are lowercased words; runs of non-ASCII letters (e.g. Thai, written without
+spaces) are split into character bigrams instead. See benchmarks/criteria_prefilter.py
+for the recall/size trade-off.
+"""
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any
+
+import numpy as np
+
+# Criteria kept per skill; 0 disables the prefilter
+CRITERIA_PREFILTER_TOP_K = int(os.getenv("CRITERIA_PREFILTER_TOP_K", 0))
+# Also keep criteria scoring at least this fraction of the K-th best score in their skill
+CRITERIA_PREFILTER_MARGIN = float(os.getenv("CRITERIA_PREFILTER_MARGIN", 0.8))
+# Skills whose best criterion scores below this are sent to the LLM untrimmed
+CRITERIA_PREFILTER_MIN_SCORE = float(os.getenv("CRITERIA_PREFILTER_MIN_SCORE", 0.02))
+
+# \w misses Thai combining vowel/tone marks, so the whole Thai block is included explicitly
+_WORD_RE = re.compile(r"[\w\u0e00-\u0e7f]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or that the "
+    "their this to use uses using was were will with within".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word.isascii():
+            if len(word) > 1 and word not in STOPWORDS:
+                terms.append(word)
+        elif len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def score_criteria(text: str, criteria: list[dict[str, Any]]) -> np.ndarray:
+    """Cosine similarity of each criterion description to ``text`` (same order as criteria)."""
+    docs = [Counter(tokenize(c.get("description") or "")) for c in criteria]
+    query = Counter(tokenize(text))
+    vocab = {term: i for i, term in enumerate(sorted(set().union(*docs) if docs else ()))}
+    if not vocab:
+        return np.zeros(len(criteria))
+
+    doc_tf = np.zeros((len(docs), len(vocab)))
+    for row, counts in enumerate(docs):
+        for term, n in counts.items():
+            doc_tf[row, vocab[term]] = n
+    query_tf = np.zeros(len(vocab))
+    for term, n in query.items():
+        col = vocab.get(term)
+        if col is not None:
+            query_tf[col] = n
+
+    # Smoothed IDF over the criteria: terms shared by every level of every skill weigh little.
+    df = np.count_nonzero(doc_tf, axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+    doc_vecs = np.log1p(doc_tf) * idf
+    query_vec = np.log1p(query_tf) * idf
+    doc_norms = np.linalg.norm(doc_vecs, axis=1)
+    query_norm = np.linalg.norm(query_vec)
+    if query_norm == 0:
+        return np.zeros(len(criteria))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (doc_vecs @ query_vec) / (doc_norms * query_norm)
+    return np.nan_to_num(scores)
+
+
+def prefilter_criteria(
+    text: str,
+    criteria: list[dict[str, Any]],
+    top_k: int = CRITERIA_PREFILTER_TOP_K,
+    margin: float = CRITERIA_PREFILTER_MARGIN,
+    min_score: float = CRITERIA_PREFILTER_MIN_SCORE,
+) -> list[dict[str, Any]]:
+    """
+    Criteria worth sending to the LLM, in their original order.
+
+    Trims within each skill only; a skill below min_score keeps all of its criteria, so
+    text with no lexical overlap at all gets the criteria back unfiltered.
+    """
+    if top_k <= 0 or not criteria:
+        return list(criteria)
+    scores = score_criteria(text, criteria)
+
+    by_skill: dict[Any, list[int]] = defaultdict(list)
+    for i, c in enumerate(criteria):
+        by_skill[c.get("rubric_skill_history_id")].append(i)
+
+    keep: set[int] = set()
+    for indices in by_skill.values():
+        ranked = sorted(indices, key=lambda i: scores[i], reverse=True)
+        if scores[ranked[0]] < min_score:
+            keep.update(indices)
+            continue
+        cutoff = scores[ranked[min(top_k, len(ranked)) - 1]] * margin
+        keep.update(i for n, i in enumerate(ranked) if n < top_k or scores[i] >= cutoff)
+    return [c for i, c in enumerate(criteria) if i in keep]
+
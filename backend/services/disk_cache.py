@@ -0,0 +1,150 @@
+"""
+Small JSON cache on local disk with LRU, size-based and optional TTL eviction.
+
+One file per key under ``directory/<key[:2]>/<key>.json``. A hit refreshes the file's
+mtime, so eviction (oldest mtime first) approximates LRU across processes sharing
+the directory. Eviction runs when the size passes max_bytes and trims down to
+EVICT_LOW_WATER of it, so a full cache is not re-scanned on every write.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Root for local caches; each cache gets its own subdirectory. Relative paths (here and
+# in the other storage settings) resolve against the backend directory.
+CACHE_ROOT = BACKEND_DIR / os.getenv("CACHE_DIR", "storage/cache")
+# Fraction of max_bytes an eviction pass trims down to
+EVICT_LOW_WATER = 0.9
+
+
+class DiskCache:
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            if self.ttl_seconds is not None and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                self._remove(path)
+                self.misses += 1
+                return None
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        # Write-then-rename so readers never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += len(data) - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under the low-water mark."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_LOW_WATER
+        now = time.time()
+        for mtime, size, path in entries:
+            expired = self.ttl_seconds is not None and now - mtime > self.ttl_seconds
+            if not expired and total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_bytes": self.max_bytes,
+            "size_bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
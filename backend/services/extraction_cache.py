@@ -0,0 +1,61 @@
+"""
+Content-hash keyed cache of extracted PDF text.
+
+Keyed by SHA-256 of the uploaded bytes plus EXTRACTOR_VERSION and the extraction
+settings below, so a repeat upload of the same file skips pdfplumber/OCR entirely while
+a changed tier chain, quality threshold or OCR resolution re-extracts. Bump
+EXTRACTOR_VERSION whenever extraction code would change output for the same input.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+from services.disk_cache import BACKEND_DIR, CACHE_ROOT, DiskCache
+
+EXTRACTOR_VERSION = "3"
+
+EXTRACTION_CACHE_DIR = BACKEND_DIR / os.getenv("EXTRACTION_CACHE_DIR", CACHE_ROOT / "extraction")
+# 0 disables the cache
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+# Settings that shape extracted text (read by OpenAIService, part of the cache key).
+# Extractor chain, cheapest first; a page escalates to the next tier only when its
+# text fails the quality check (see services.pdf_extraction.page_text_ok)
+EXTRACTOR_TIERS = [t.strip() for t in os.getenv("EXTRACTOR_TIERS", "pypdf,pdfplumber,ocr").split(",") if t.strip()]
+# Pages whose text is shorter than this escalate to the next tier (ultimately OCR)
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", 30))
+# OCR render resolution: OCR_DPI for normal pages, scaled down (not below
+# OCR_MIN_DPI) so a page bitmap never exceeds OCR_MAX_PIXELS (default ~A4 at 300 DPI)
+OCR_DPI = int(os.getenv("OCR_DPI", 300))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", 150))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", 8_700_000))
+
+
+def extraction_settings() -> dict:
+    return {
+        "tiers": EXTRACTOR_TIERS,
+        "ocr_min_page_chars": OCR_MIN_PAGE_CHARS,
+        "ocr_dpi": OCR_DPI,
+        "ocr_min_dpi": OCR_MIN_DPI,
+        "ocr_max_pixels": OCR_MAX_PIXELS,
+    }
+
+
+def extraction_cache_key(content_sha256: str) -> str:
+    settings = json.dumps(extraction_settings(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{EXTRACTOR_VERSION}:{settings}:{content_sha256}".encode("ascii")).hexdigest()
+
+
+_extraction_cache: Optional[DiskCache] = None
+
+
+def get_extraction_cache() -> DiskCache:
+    """Get or create the shared extraction cache."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = DiskCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES)
+    return _extraction_cache
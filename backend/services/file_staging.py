@@ -0,0 +1,185 @@
+"""
+Server-side staging of uploaded files between /portfolio/import and evaluation.
+
+Import moves the spooled upload into STAGING_DIR and hands the client a short opaque
+token instead of the base64 file. The evaluation endpoints claim the token, copy
+(hard-link when possible) the file into the blob store and delete the staged copy, so a
+token is good for one evaluation. Unclaimed tokens expire after STAGED_FILE_TTL_SECONDS;
+expired files are garbage-collected opportunistically on stage and on claim.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Relative paths resolve against the backend directory, whatever the working directory
+STAGING_DIR = BACKEND_DIR / os.getenv("STAGING_DIR", "storage/staging")
+STAGED_FILE_TTL_SECONDS = int(os.getenv("STAGED_FILE_TTL_SECONDS", 6 * 3600))
+# Minimum seconds between two garbage-collection sweeps of STAGING_DIR
+STAGING_GC_INTERVAL_SECONDS = int(os.getenv("STAGING_GC_INTERVAL_SECONDS", 300))
+
+TOKEN_PREFIX = "stg_"
+
+_gc_lock = threading.Lock()
+_last_gc = 0.0
+
+
+@dataclass
+class StagedFile:
+    path: Path
+    sha256: str
+    size: int
+    filename: str | None
+    expires_at: float
+
+
+def is_staging_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX)
+
+
+def _paths(token: str) -> tuple[Path, Path]:
+    if not is_staging_token(token) or not token[len(TOKEN_PREFIX):].replace("-", "").replace("_", "").isalnum():
+        raise ValueError("file_token is malformed")
+    return STAGING_DIR / f"{token}.pdf", STAGING_DIR / f"{token}.json"
+
+
+def new_spool_file():
+    """Temp file inside STAGING_DIR, so staging it later is a same-filesystem rename."""
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(delete=False, suffix=".upload", dir=STAGING_DIR)
+
+
+def stage_file(src_path: str | os.PathLike, *, sha256: str, size: int, filename: str | None) -> str:
+    """Move ``src_path`` into staging and return a new token for it."""
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    token = TOKEN_PREFIX + secrets.token_urlsafe(24)
+    data_path, meta_path = _paths(token)
+    shutil.move(str(src_path), data_path)
+    meta = {
+        "sha256": sha256,
+        "size": size,
+        "filename": filename,
+        "expires_at": time.time() + STAGED_FILE_TTL_SECONDS,
+    }
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    maybe_collect_garbage()
+    return token
+
+
+def resolve_staged_file(token: str) -> StagedFile:
+    """
+    Look up a staged file by token.
+
+    Raises:
+        ValueError: If the token is malformed, unknown or expired
+    """
+    data_path, meta_path = _paths(token)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        raise ValueError("file_token is unknown or expired; upload the file again") from None
+    if meta["expires_at"] < time.time() or not data_path.is_file():
+        raise ValueError("file_token is unknown or expired; upload the file again")
+    return StagedFile(
+        path=data_path,
+        sha256=meta["sha256"],
+        size=meta["size"],
+        filename=meta.get("filename"),
+        expires_at=meta["expires_at"],
+    )
+
+
+@contextmanager
+def claim_staged_file(token: str) -> Iterator[StagedFile]:
+    """
+    Claim a staged file for a single use.
+
+    The data file is renamed out of the token's name first, so a concurrent claim of the
+    same token fails as unknown. The staged pair is deleted when the block exits normally;
+    if the block raises, the file is put back and the token stays valid until it expires.
+
+    Raises:
+        ValueError: If the token is malformed, unknown, expired or already claimed
+    """
+    staged = resolve_staged_file(token)
+    data_path, meta_path = _paths(token)
+    # *.upload, so the garbage collector reaps it if the process dies mid-claim.
+    claimed_path = data_path.with_name(f"{token}.{os.getpid()}.{time.monotonic_ns()}.upload")
+    try:
+        os.rename(data_path, claimed_path)
+    except FileNotFoundError:
+        raise ValueError("file_token is unknown or expired; upload the file again") from None
+    staged.path = claimed_path
+    try:
+        yield staged
+    except BaseException:
+        os.replace(claimed_path, data_path)
+        raise
+    for p in (claimed_path, meta_path):
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+    maybe_collect_garbage()
+
+
+def collect_garbage(now: float | None = None) -> int:
+    """Delete expired staged files and abandoned spool files; returns files removed."""
+    now = now or time.time()
+    removed = 0
+    if not STAGING_DIR.is_dir():
+        return 0
+    for meta_path in STAGING_DIR.glob(f"{TOKEN_PREFIX}*.json"):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                expires_at = json.load(fh)["expires_at"]
+        except FileNotFoundError:
+            continue
+        except (ValueError, KeyError):
+            expires_at = 0
+        if expires_at < now:
+            for p in (meta_path.with_suffix(".pdf"), meta_path):
+                try:
+                    p.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    # Spool files whose request died before staging or cleanup.
+    for spool_path in STAGING_DIR.glob("*.upload"):
+        try:
+            if now - spool_path.stat().st_mtime > STAGED_FILE_TTL_SECONDS:
+                spool_path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    if removed:
+        logger.info(f"Staging GC removed {removed} files")
+    return removed
+
+
+def maybe_collect_garbage() -> None:
+    """Run collect_garbage at most once per STAGING_GC_INTERVAL_SECONDS."""
+    global _last_gc
+    now = time.time()
+    if now - _last_gc < STAGING_GC_INTERVAL_SECONDS or not _gc_lock.acquire(blocking=False):
+        return
+    try:
+        _last_gc = now
+        collect_garbage(now)
+    finally:
+        _gc_lock.release()
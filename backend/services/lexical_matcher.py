@@ -0,0 +1,82 @@
+"""
+Offline criteria matcher: lexical similarity instead of an LLM.
+
+Implements OpenAIMatchProtocol with the TF-IDF scorer from services.criteria_prefilter,
+so evaluations run instantly, deterministically and without network access (a
+"preview", or a fallback while the provider is down). Per rubric skill the best-scoring
+criterion is matched when its score reaches LEXICAL_MATCH_MIN_SCORE; confidence is the
+score scaled so LEXICAL_MATCH_FULL_SCORE maps to 1.0.
+
+Its rows are recorded with matcher "lexical" and never replace an LLM evaluation or
+classification (see services.ai_evaluation.PREVIEW_MATCHERS).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from collections import Counter
+from typing import Any
+
+from services.criteria_prefilter import score_criteria, tokenize
+
+LEXICAL_MATCH_MIN_SCORE = float(os.getenv("LEXICAL_MATCH_MIN_SCORE", 0.08))
+LEXICAL_MATCH_FULL_SCORE = float(os.getenv("LEXICAL_MATCH_FULL_SCORE", 0.5))
+# Evidence snippets are cut to this many characters
+LEXICAL_EVIDENCE_MAX_CHARS = 200
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _best_sentence(sentences: list[str], terms: set[str]) -> str | None:
+    best, best_hits = None, 0
+    for sentence in sentences:
+        hits = len(terms.intersection(tokenize(sentence)))
+        if hits > best_hits:
+            best, best_hits = sentence, hits
+    return best[:LEXICAL_EVIDENCE_MAX_CHARS] if best else None
+
+
+class LexicalMatcher:
+    # Name in services.matchers.MATCHERS; a preview matcher (services.ai_evaluation.PREVIEW_MATCHERS)
+    name = "lexical"
+
+    async def match_text_to_criteria(self, text: str, classification: dict, criteria: list) -> dict:
+        # NumPy scoring of a long portfolio takes a while; keep it off the event loop.
+        scores = await asyncio.to_thread(score_criteria, text, criteria) if criteria else []
+        best: dict[Any, int] = {}
+        for i, c in enumerate(criteria):
+            sid = c.get("rubric_skill_history_id")
+            if sid not in best or scores[i] > scores[best[sid]]:
+                best[sid] = i
+
+        sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+        matches = []
+        matched_terms: set[str] = set()
+        for sid, i in best.items():
+            if scores[i] < LEXICAL_MATCH_MIN_SCORE:
+                continue
+            c = criteria[i]
+            terms = set(tokenize(c.get("description") or ""))
+            matched_terms |= terms
+            matches.append(
+                {
+                    "criteria_history_id": c.get("criteria_history_id"),
+                    "rubric_skill_history_id": sid,
+                    "level_history_id": c.get("level_history_id"),
+                    "matched_text": _best_sentence(sentences, terms),
+                    "confidence": round(min(1.0, float(scores[i]) / LEXICAL_MATCH_FULL_SCORE), 3),
+                    "matched_from": "lexical",
+                }
+            )
+
+        # Most frequent portfolio terms that also occur in matched criteria stand in for skills.
+        counts = Counter(t for t in tokenize(text) if t in matched_terms)
+        return {
+            "classification": {
+                "skills": [t for t, _ in counts.most_common(10)],
+                "categories": [],
+                "summary": "Lexical preview match (no LLM).",
+            },
+            "matches": matches,
+        }
@@ -0,0 +1,47 @@
+"""
+Response cache for deterministic (temperature 0) LLM calls.
+
+Keyed by a hash of the model, the prompt template version and the normalised prompt
+inputs, so re-evaluating an unchanged portfolio against an unchanged rubric snapshot
+is answered from disk without calling the model. Bump the caller's prompt version
+whenever its prompt or response parsing changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from services.disk_cache import BACKEND_DIR, CACHE_ROOT, DiskCache
+
+LLM_CACHE_DIR = BACKEND_DIR / os.getenv("LLM_CACHE_DIR", CACHE_ROOT / "llm")
+# 0 disables the cache
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-extractions differing only in spacing share a key."""
+    return " ".join(text.split())
+
+
+def llm_cache_key(*, model: str, prompt_version: str, **inputs: Any) -> str:
+    payload = json.dumps(
+        {"model": model, "prompt_version": prompt_version, "inputs": inputs},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_llm_cache: Optional[DiskCache] = None
+
+
+def get_llm_cache() -> DiskCache:
+    """Get or create the shared LLM response cache."""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = DiskCache(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+    return _llm_cache
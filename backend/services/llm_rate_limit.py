@@ -0,0 +1,155 @@
+"""
+Client-side rate limiting and retry policy for OpenAI calls.
+
+A process-wide RateLimiter keeps two token buckets, requests per minute and tokens per
+minute, so bursts queue inside the process instead of turning into provider 429s.
+Callers reserve an estimated token count up front and settle it with the real usage
+afterwards. A 429 pauses the whole limiter for the provider's Retry-After, and
+retry_delay() gives exponential backoff with full jitter for the retry loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+from services.text_chunks import estimate_text_tokens
+
+# 0 disables the corresponding bucket
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", 500))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", 200_000))
+# Backoff: attempt n waits uniform(0, min(max, base * 2**n)) unless Retry-After says more
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", 1))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", 60))
+
+
+class TokenBucket:
+    """Refills continuously at ``per_minute / 60`` per second up to ``per_minute``."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (requests larger than capacity wait for a full bucket)."""
+        self._refill(now)
+        need = min(amount, self.capacity)
+        if self.level >= need:
+            return 0.0
+        return (need - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative: oversized requests and usage corrections are paid back by refill.
+        self.level -= amount
+
+
+class RateLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        # Held while a caller waits for capacity, so callers are admitted in arrival order.
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._admitted = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and ``tokens`` tokens fit in the buckets, then take them."""
+        self._waiting += 1
+        start = time.monotonic()
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    delay = self._paused_until - now
+                    if self.requests is not None:
+                        delay = max(delay, self.requests.wait_time(1, now))
+                    if self.tokens is not None:
+                        delay = max(delay, self.tokens.wait_time(tokens, now))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                if self.requests is not None:
+                    self.requests.take(1)
+                if self.tokens is not None:
+                    self.tokens.take(tokens)
+                self._admitted += 1
+        finally:
+            self._waiting -= 1
+            self._wait_seconds += time.monotonic() - start
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of an admitted call is known."""
+        if self.tokens is not None and actual is not None:
+            self.tokens.take(actual - estimated)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all admissions for ``seconds`` (provider returned 429)."""
+        self._throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket._refill(now)
+        return {
+            "rpm_limit": self.requests.capacity if self.requests else None,
+            "tpm_limit": self.tokens.capacity if self.tokens else None,
+            "requests_available": self.requests.level if self.requests else None,
+            "tokens_available": self.tokens.level if self.tokens else None,
+            "paused_for_seconds": max(0.0, self._paused_until - now),
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "throttled_429": self._throttled,
+            "total_wait_seconds": self._wait_seconds,
+        }
+
+
+def estimate_tokens(messages: list[dict], max_tokens: Optional[int]) -> int:
+    prompt_tokens = sum(estimate_text_tokens(str(m.get("content") or "")) for m in messages)
+    return prompt_tokens + (max_tokens or 1000)
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff for 0-based ``attempt``; never shorter than Retry-After."""
+    backoff = random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+    if retry_after is not None:
+        return max(retry_after, backoff)
+    return backoff
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds from ``retry-after-ms`` / ``retry-after`` (delta-seconds form) headers, if present."""
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the process-wide OpenAI rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)
+    return _rate_limiter
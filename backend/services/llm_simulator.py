@@ -0,0 +1,184 @@
+"""
+In-process stand-in for the OpenAI chat completions API, for load tests without network.
+
+Plugged in as the httpx transport of OpenAIService's client when OPENAI_SIMULATOR is set:
+
+- ``simulate``: answers locally after a sampled latency, injecting 429s and 5xx errors at
+  the configured rates. Matching prompts (services.match_prompt) get a compact answer
+  that picks criteria pseudo-randomly but deterministically per request; other prompts
+  get an empty classification.
+- ``record``: forwards to the real API and saves every successful response as a cassette.
+- ``replay``: serves cassettes by request hash; a miss is answered per
+  OPENAI_CASSETTE_MISS (``error`` -> 404, ``simulate``).
+
+Latency spec (OPENAI_SIM_LATENCY_MS): ``fixed:<ms>``, ``uniform:<min>,<max>`` or
+``lognormal:<median>,<sigma>``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from services.disk_cache import BACKEND_DIR
+from services.text_chunks import estimate_text_tokens
+
+# off | simulate | record | replay
+OPENAI_SIMULATOR = os.getenv("OPENAI_SIMULATOR", "off")
+OPENAI_SIM_LATENCY_MS = os.getenv("OPENAI_SIM_LATENCY_MS", "lognormal:800,0.5")
+OPENAI_SIM_ERROR_RATE = float(os.getenv("OPENAI_SIM_ERROR_RATE", 0))
+OPENAI_SIM_429_RATE = float(os.getenv("OPENAI_SIM_429_RATE", 0))
+OPENAI_SIM_SEED = os.getenv("OPENAI_SIM_SEED")
+OPENAI_CASSETTE_DIR = BACKEND_DIR / os.getenv("OPENAI_CASSETTE_DIR", "storage/cassettes")
+# error | simulate
+OPENAI_CASSETTE_MISS = os.getenv("OPENAI_CASSETTE_MISS", "error")
+
+SIMULATOR_MODES = ("simulate", "record", "replay")
+_DECODED_BODY_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+_CRITERIA_ROW_RE = re.compile(r"^(c\d+)\|(s\d+)\|", re.MULTILINE)
+
+
+def parse_latency_spec(spec: str):
+    """Sampler ``rng -> seconds`` for a latency spec (see module docstring)."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"invalid OPENAI_SIM_LATENCY_MS {spec!r}")
+
+
+def cassette_key(body: dict) -> str:
+    relevant = {k: body.get(k) for k in ("model", "messages", "temperature", "max_tokens")}
+    payload = json.dumps(relevant, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _completion(body: dict, content: str) -> dict:
+    prompt_tokens = sum(estimate_text_tokens(str(m.get("content") or "")) for m in body.get("messages", []))
+    completion_tokens = estimate_text_tokens(content)
+    return {
+        "id": f"chatcmpl-sim-{cassette_key(body)[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "simulated"),
+        "choices": [
+            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _error(status: int, message: str, headers: Optional[dict] = None) -> httpx.Response:
+    return httpx.Response(
+        status, headers=headers, json={"error": {"message": message, "type": "simulated_error"}}
+    )
+
+
+def simulated_content(body: dict) -> str:
+    """Plausible, deterministic answer for a chat request."""
+    system = next((m.get("content") or "" for m in body.get("messages", []) if m.get("role") == "system"), "")
+    rows = _CRITERIA_ROW_RE.findall(system)
+    if not rows:
+        return json.dumps({"skills": [], "categories": [], "summary": "Simulated response."})
+    rng = random.Random(cassette_key(body))
+    by_skill: dict[str, list[str]] = {}
+    for criterion, skill in rows:
+        by_skill.setdefault(skill, []).append(criterion)
+    matches = [
+        [rng.choice(criteria), round(rng.uniform(0.4, 0.95), 2), "simulated evidence"]
+        for criteria in by_skill.values()
+        if rng.random() < 0.7
+    ]
+    return json.dumps(
+        {"c": {"skills": [], "categories": [], "summary": "Simulated response."}, "m": matches}
+    )
+
+
+class SimulatedOpenAITransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        mode: str,
+        upstream: Optional[httpx.AsyncBaseTransport] = None,
+        latency_spec: str = OPENAI_SIM_LATENCY_MS,
+        error_rate: float = OPENAI_SIM_ERROR_RATE,
+        rate_limit_rate: float = OPENAI_SIM_429_RATE,
+        cassette_dir: Path = OPENAI_CASSETTE_DIR,
+        cassette_miss: str = OPENAI_CASSETTE_MISS,
+        seed: Optional[str] = OPENAI_SIM_SEED,
+    ):
+        if mode not in SIMULATOR_MODES:
+            raise ValueError(f"OPENAI_SIMULATOR must be one of off, {', '.join(SIMULATOR_MODES)}")
+        self.mode = mode
+        self.upstream = upstream or httpx.AsyncHTTPTransport()
+        self.sample_latency = parse_latency_spec(latency_spec)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.cassette_dir = Path(cassette_dir)
+        self.cassette_miss = cassette_miss
+        self.rng = random.Random(seed)
+
+    def _cassette_path(self, key: str) -> Path:
+        return self.cassette_dir / key[:2] / f"{key}.json"
+
+    async def _simulate(self, body: dict) -> httpx.Response:
+        await asyncio.sleep(self.sample_latency(self.rng))
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return _error(429, "Simulated rate limit", {"retry-after": "1"})
+        if roll < self.rate_limit_rate + self.error_rate:
+            return _error(500, "Simulated server error")
+        return httpx.Response(200, json=_completion(body, simulated_content(body)))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            return _error(404, f"simulator does not implement {request.url.path}")
+        body = json.loads(await request.aread())
+        if self.mode == "simulate":
+            return await self._simulate(body)
+
+        path = self._cassette_path(cassette_key(body))
+        if self.mode == "replay":
+            try:
+                cassette = json.loads(path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                if self.cassette_miss == "simulate":
+                    return await self._simulate(body)
+                return _error(404, f"no cassette for request {path.stem}")
+            return httpx.Response(cassette["status"], json=cassette["response"])
+
+        response = await self.upstream.handle_async_request(request)
+        content = await response.aread()
+        if response.status_code == 200:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cassette = {"request": body, "status": 200, "response": json.loads(content)}
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(cassette, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        # aread() already decoded the body; forwarding these would make the client decode it again.
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _DECODED_BODY_HEADERS
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.upstream.aclose()
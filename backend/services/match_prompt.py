@@ -0,0 +1,267 @@
+"""
+Compact prompt encoding for rubric criteria matching.
+
+Criteria are sent as one short row each (``c3|s1|l2|description``) with local ids instead
+of ``json.dumps(criteria, indent=2)``. The model answers with rows of
+``[local criteria id, confidence, short evidence]``, and decode_matches maps them back to
+the match dicts the rest of the pipeline expects.
+
+The static part (instructions + criteria table) forms the system message and the portfolio
+text goes last, so requests for the same rubric snapshot share a long identical prefix
+that the provider can cache. A token budget caps how much portfolio text a single
+request may carry; compile_within_budget splits criteria tables that leave too little
+of it.
+
+The output cap of a request is sized from the completion tokens per criterion measured
+on recent answers (OutputTokenSizer). An answer that still hits the cap is retried by
+the caller with a larger one, up to MATCH_MAX_OUTPUT_TOKENS, and then split (halve).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from services.match_routing import shard_criteria
+from services.text_chunks import estimate_text_tokens
+
+logger = logging.getLogger(__name__)
+
+# Estimated input tokens per matching request (instructions + criteria + text chunk)
+MATCH_PROMPT_TOKEN_BUDGET = int(os.getenv("MATCH_PROMPT_TOKEN_BUDGET", 6000))
+# A chunk never gets less text than this, even when the criteria table eats the budget
+MATCH_MIN_TEXT_TOKENS = int(os.getenv("MATCH_MIN_TEXT_TOKENS", 300))
+# Evidence quoted back per match; the model is asked to keep it this short
+MATCH_EVIDENCE_MAX_WORDS = int(os.getenv("MATCH_EVIDENCE_MAX_WORDS", 12))
+# Output tokens reserved per criterion the model may return, plus a fixed allowance;
+# the per-criterion figure grows to what recent answers actually used
+OUTPUT_TOKENS_PER_MATCH = 30
+OUTPUT_TOKENS_BASE = 200
+# Largest output cap a truncated answer is retried with before its criteria are split
+MATCH_MAX_OUTPUT_TOKENS = int(os.getenv("MATCH_MAX_OUTPUT_TOKENS", 4096))
+
+INSTRUCTIONS = (
+    "You match portfolio text to passing rubric criteria. Output valid JSON only.\n"
+    "Criteria rows are `id|skill|level|description`; skill and level are group ids.\n"
+    "Answer with one JSON object:\n"
+    '{"c": {"skills": [..], "categories": [..], "summary": "<one sentence>"}, '
+    '"m": [["<criteria id>", <confidence 0-1>, "<evidence>"], ...]}\n'
+    "- c: skills, categories and a short summary of the portfolio text.\n"
+    "- m: every criterion the text satisfies; evidence is an exact snippet of at most "
+    "{max_words} words.\n"
+    "- If nothing matches, m is []. No commentary."
+)
+
+
+def prompt_settings() -> dict[str, Any]:
+    """Everything in this module that shapes a request; part of the match LLM cache key."""
+    return {
+        "instructions": INSTRUCTIONS,
+        "evidence_max_words": MATCH_EVIDENCE_MAX_WORDS,
+        "token_budget": MATCH_PROMPT_TOKEN_BUDGET,
+        "min_text_tokens": MATCH_MIN_TEXT_TOKENS,
+        "output_tokens": [OUTPUT_TOKENS_BASE, OUTPUT_TOKENS_PER_MATCH],
+    }
+
+
+class MatchTruncatedError(RuntimeError):
+    """The answer for a single skill still hit MATCH_MAX_OUTPUT_TOKENS."""
+
+
+class OutputTokenSizer:
+    """
+    Sizes the output cap of matching requests from measured completion usage.
+
+    Keeps the completion tokens per criterion of the last ``window`` complete answers;
+    once ``min_samples`` are in, the cap reserves their 95th percentile plus 25% per
+    criterion (never less than OUTPUT_TOKENS_PER_MATCH) on top of OUTPUT_TOKENS_BASE.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.truncated = 0
+
+    def record(self, criteria: int, completion_tokens: int | None) -> None:
+        if criteria and completion_tokens:
+            self._samples.append(max(0, completion_tokens - OUTPUT_TOKENS_BASE) / criteria)
+
+    def per_criterion(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return OUTPUT_TOKENS_PER_MATCH
+        ordered = sorted(self._samples)
+        return max(OUTPUT_TOKENS_PER_MATCH, ordered[int(0.95 * (len(ordered) - 1))] * 1.25)
+
+    def cap(self, criteria: int) -> int:
+        return min(MATCH_MAX_OUTPUT_TOKENS, OUTPUT_TOKENS_BASE + math.ceil(self.per_criterion() * criteria))
+
+    def stats(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "tokens_per_criterion": self.per_criterion(),
+            "truncated": self.truncated,
+        }
+
+
+output_token_sizer = OutputTokenSizer()
+
+
+@dataclass
+class CompiledCriteria:
+    """Criteria table for one rubric snapshot, plus the local-id mapping to decode answers."""
+
+    table: str
+    by_local_id: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def static_prompt(self) -> str:
+        return (
+            INSTRUCTIONS.replace("{max_words}", str(MATCH_EVIDENCE_MAX_WORDS))
+            + "\n\nCriteria:\n"
+            + self.table
+        )
+
+    def text_token_allowance(self, max_chunk_tokens: int, classification: dict) -> int:
+        """Tokens of portfolio text one request may carry under MATCH_PROMPT_TOKEN_BUDGET."""
+        fixed = estimate_text_tokens(self.static_prompt) + estimate_text_tokens(
+            _classification_hint(classification)
+        )
+        return max(MATCH_MIN_TEXT_TOKENS, min(max_chunk_tokens, MATCH_PROMPT_TOKEN_BUDGET - fixed))
+
+    def fits_budget(self, classification: dict) -> bool:
+        """Whether MATCH_MIN_TEXT_TOKENS of text fit next to this table within the budget."""
+        fixed = estimate_text_tokens(self.static_prompt) + estimate_text_tokens(
+            _classification_hint(classification)
+        )
+        return fixed + MATCH_MIN_TEXT_TOKENS <= MATCH_PROMPT_TOKEN_BUDGET
+
+    def max_output_tokens(self) -> int:
+        return output_token_sizer.cap(len(self.by_local_id))
+
+    def messages(self, text: str, classification: dict, part: str) -> list[dict]:
+        user = _classification_hint(classification) + f"Portfolio text ({part}):\n{text}"
+        return [
+            {"role": "system", "content": self.static_prompt},
+            {"role": "user", "content": user},
+        ]
+
+
+def _classification_hint(classification: dict) -> str:
+    if not classification:
+        return ""
+    return (
+        "Classification hint: "
+        + json.dumps(classification, ensure_ascii=False, separators=(",", ":"))
+        + "\n\n"
+    )
+
+
+def _one_line(description: str) -> str:
+    return " ".join(str(description).split()).replace("|", "/")
+
+
+def compile_criteria(criteria: list[dict[str, Any]]) -> CompiledCriteria:
+    """Encode criteria payload dicts (see services.ai_evaluation) as compact rows."""
+    skill_ids: dict[Any, str] = {}
+    level_ids: dict[Any, str] = {}
+    rows = []
+    by_local_id = {}
+    for n, c in enumerate(criteria, start=1):
+        local_id = f"c{n}"
+        skill = skill_ids.setdefault(c.get("rubric_skill_history_id"), f"s{len(skill_ids) + 1}")
+        level = level_ids.setdefault(c.get("level_history_id"), f"l{len(level_ids) + 1}")
+        rows.append(f"{local_id}|{skill}|{level}|{_one_line(c.get('description') or '')}")
+        by_local_id[local_id] = c
+    return CompiledCriteria(table="\n".join(rows), by_local_id=by_local_id)
+
+
+def _skill_count(criteria: list[dict[str, Any]]) -> int:
+    return len({c.get("rubric_skill_history_id") for c in criteria})
+
+
+def halve(compiled: CompiledCriteria) -> list[CompiledCriteria]:
+    """Recompile as two tables of about half the skills each; a single skill stays whole."""
+    criteria = list(compiled.by_local_id.values())
+    skills = _skill_count(criteria)
+    if skills < 2:
+        return [compiled]
+    return [compile_criteria(shard) for shard in shard_criteria(criteria, (skills + 1) // 2)]
+
+
+def compile_within_budget(criteria: list[dict[str, Any]], classification: dict) -> list[CompiledCriteria]:
+    """
+    Compile criteria, halving the table by skill until each leaves MATCH_MIN_TEXT_TOKENS
+    of portfolio text within MATCH_PROMPT_TOKEN_BUDGET. A single skill whose criteria alone
+    exceed the budget is sent as is, with a warning.
+    """
+    pending = [compile_criteria(criteria)]
+    out = []
+    while pending:
+        compiled = pending.pop(0)
+        if compiled.fits_budget(classification):
+            out.append(compiled)
+            continue
+        halves = halve(compiled)
+        if len(halves) == 1:
+            logger.warning(
+                f"Criteria of one skill ({len(compiled.by_local_id)} rows) exceed "
+                f"MATCH_PROMPT_TOKEN_BUDGET={MATCH_PROMPT_TOKEN_BUDGET}; sending over budget"
+            )
+            out.append(compiled)
+            continue
+        pending[:0] = halves
+    if len(out) > 1:
+        logger.info(f"Criteria table over MATCH_PROMPT_TOKEN_BUDGET; split into {len(out)} requests")
+    return out
+
+
+def _confidence(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def decode_matches(compiled: CompiledCriteria, parsed: Any) -> dict[str, Any]:
+    """
+    Turn the compact answer into {"classification": {...}, "matches": [match dicts]}.
+
+    Rows naming an unknown criteria id are dropped. An answer in the old verbose shape
+    ({"classification", "matches"}) is passed through with confidences normalised.
+    """
+    if isinstance(parsed, list):
+        parsed = {"matches": parsed}
+    if not isinstance(parsed, dict):
+        raise ValueError("match response is not a JSON object")
+
+    if "m" not in parsed and "matches" in parsed:
+        matches = [m for m in parsed.get("matches") or [] if isinstance(m, dict)]
+        for item in matches:
+            if "confidence" in item:
+                item["confidence"] = _confidence(item["confidence"])
+        classification = parsed.get("classification") or {}
+        return {"classification": classification, "matches": matches}
+
+    matches = []
+    for row in parsed.get("m") or []:
+        if not isinstance(row, (list, tuple)) or not row:
+            continue
+        criterion = compiled.by_local_id.get(str(row[0]).strip())
+        if criterion is None:
+            continue
+        matches.append(
+            {
+                "criteria_history_id": criterion.get("criteria_history_id"),
+                "rubric_skill_history_id": criterion.get("rubric_skill_history_id"),
+                "level_history_id": criterion.get("level_history_id"),
+                "confidence": _confidence(row[1]) if len(row) > 1 else 0.0,
+                "matched_text": str(row[2]) if len(row) > 2 and row[2] else None,
+                "matched_from": "text",
+            }
+        )
+    classification = parsed.get("c") if isinstance(parsed.get("c"), dict) else {}
+    return {"classification": classification, "matches": matches}
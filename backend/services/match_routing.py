@@ -0,0 +1,123 @@
+"""
+Cascaded model routing for criteria matching.
+
+MATCH_MODEL_TIERS lists chat models cheapest first (default: OPENAI_MODEL alone, i.e. no
+cascade). The first tier matches every skill. A skill is re-run on the next tier only
+when it is uncertain:
+
+- its best match scores below MATCH_ESCALATE_CONFIDENCE, or
+- different chunks of the portfolio matched it at different levels.
+
+The stronger tier's answer replaces the weaker one for those skills only. A skill that
+no tier matched stays unmatched: re-checking every miss would send most of a rubric to
+the strong tier and cancel the savings.
+
+Within a tier, MATCH_SKILLS_PER_SHARD > 0 splits the criteria into shards of that many
+skills (shard_criteria), each matched by its own concurrent requests. Every request then
+carries a smaller table and produces a shorter answer, so large rubrics no longer run
+into the output token limit.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Iterable
+
+
+def shard_criteria(criteria: list[dict[str, Any]], skills_per_shard: int) -> list[list[dict[str, Any]]]:
+    """
+    Split criteria into shards of at most ``skills_per_shard`` rubric skills each, keeping
+    every skill's criteria together and in order. ``skills_per_shard`` <= 0 means one shard.
+    """
+    if skills_per_shard <= 0 or not criteria:
+        return [list(criteria)]
+    by_skill: dict[Any, list] = defaultdict(list)
+    for c in criteria:
+        by_skill[c.get("rubric_skill_history_id")].append(c)
+    groups = list(by_skill.values())
+    return [
+        [c for group in groups[i:i + skills_per_shard] for c in group]
+        for i in range(0, len(groups), skills_per_shard)
+    ]
+
+
+def conflicting_skills(chunk_matches: Iterable[list[dict[str, Any]]]) -> set:
+    """
+    Skills whose best level differs between chunks.
+
+    A chunk usually satisfies several levels of one skill, so each chunk is first reduced
+    to its highest-confidence level per skill; only those per-chunk levels are compared.
+    """
+    levels: dict[Any, set] = defaultdict(set)
+    for matches in chunk_matches:
+        best: dict[Any, dict[str, Any]] = {}
+        for m in matches:
+            sid = m.get("rubric_skill_history_id")
+            if sid is None:
+                continue
+            current = best.get(sid)
+            if current is None or (m.get("confidence") or 0.0) > (current.get("confidence") or 0.0):
+                best[sid] = m
+        for sid, m in best.items():
+            levels[sid].add(m.get("level_history_id"))
+    return {sid for sid, found in levels.items() if len(found) > 1}
+
+
+def skills_to_escalate(matches: list[dict[str, Any]], conflicts: set, threshold: float) -> set:
+    """Skills of the reduced ``matches`` that are low-confidence or in ``conflicts``."""
+    low = {
+        m.get("rubric_skill_history_id")
+        for m in matches
+        if (m.get("confidence") or 0.0) < threshold
+    }
+    matched = {m.get("rubric_skill_history_id") for m in matches}
+    return (low | (conflicts & matched)) - {None}
+
+
+class MatchTierStats:
+    """Per-model counters for matching runs: calls, skills sent/escalated/matched and latency."""
+
+    def __init__(self):
+        self._tiers: dict[str, dict] = defaultdict(
+            lambda: {
+                "runs": 0,
+                "errors": 0,
+                "calls": 0,
+                "skills": 0,
+                "skills_escalated": 0,
+                "skills_matched": 0,
+                "total_seconds": 0.0,
+            }
+        )
+
+    def record(
+        self,
+        model: str,
+        *,
+        calls: int,
+        skills: int,
+        skills_matched: int,
+        seconds: float,
+        escalated: bool = False,
+        error: bool = False,
+    ) -> None:
+        t = self._tiers[model]
+        t["runs"] += 1
+        t["errors"] += int(error)
+        t["calls"] += calls
+        t["skills"] += skills
+        t["skills_escalated"] += skills if escalated else 0
+        t["skills_matched"] += skills_matched
+        t["total_seconds"] += seconds
+
+    def stats(self) -> dict:
+        out = {}
+        for model, t in self._tiers.items():
+            out[model] = {
+                **t,
+                "avg_seconds_per_run": (t["total_seconds"] / t["runs"]) if t["runs"] else None,
+                "avg_calls_per_run": (t["calls"] / t["runs"]) if t["runs"] else None,
+            }
+        return out
+
+
+match_tier_stats = MatchTierStats()
@@ -0,0 +1,29 @@
+"""
+Registry of criteria matchers (OpenAIMatchProtocol implementations).
+
+EVALUATION_MATCHER picks the default; API requests may override it with ``matcher``.
+"""
+from __future__ import annotations
+
+import os
+from typing import Callable, Optional
+
+from services.ai_evaluation import OpenAIMatchProtocol
+from services.lexical_matcher import LexicalMatcher
+from services.openai_service import get_openai_service
+
+EVALUATION_MATCHER = os.getenv("EVALUATION_MATCHER", "openai")
+
+MATCHERS: dict[str, Callable[[], OpenAIMatchProtocol]] = {
+    "openai": get_openai_service,
+    "lexical": LexicalMatcher,
+}
+
+
+def get_matcher(name: Optional[str] = None) -> OpenAIMatchProtocol:
+    """Matcher called ``name`` (default EVALUATION_MATCHER); ValueError if unknown."""
+    name = name or EVALUATION_MATCHER
+    factory = MATCHERS.get(name)
+    if factory is None:
+        raise ValueError(f"unknown matcher {name!r}; available: {', '.join(MATCHERS)}")
+    return factory()
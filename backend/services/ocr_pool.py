@@ -0,0 +1,216 @@
+"""
+Dedicated, size-limited worker pool for Tesseract OCR.
+
+OCR jobs (render one page + tesseract) run in long-lived worker processes instead of
+asyncio's default executor, so a burst of scanned uploads cannot starve threads used
+for LLM and DB work. Admission is bounded: once OCR_WORKERS + OCR_MAX_QUEUE jobs are
+pending, new jobs wait up to OCR_QUEUE_TIMEOUT seconds and then fail with
+OCRPoolBusyError (mapped to 503 by the API). A multi-page document is admitted once
+(run_many): only its first page is subject to the timeout, and its pages then feed
+through a window of at most OCR_WORKERS in-flight jobs, so a long scan on an idle pool
+is never rejected by its own backlog.
+
+If a worker dies (e.g. OOM-killed), CPython marks the whole executor broken; the pool is
+then replaced and the affected job retried once on the fresh workers.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import pytesseract
+from pdf2image import convert_from_path
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = max(1, int(os.getenv("OCR_WORKERS", 2)))
+# Jobs allowed to queue behind busy workers before admission blocks
+OCR_MAX_QUEUE = max(0, int(os.getenv("OCR_MAX_QUEUE", 32)))
+# Seconds a job may wait for admission before it is rejected
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT", 30))
+
+
+class OCRPoolBusyError(Exception):
+    """Raised when the OCR pool is saturated and a job could not be admitted in time."""
+
+
+def _init_worker() -> None:
+    # Tesseract's OpenMP threads oversubscribe cores when several workers run at once.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        logger.warning(f"tesseract not available in OCR worker: {e}")
+
+
+def ocr_page(pdf_path: str, page_number: int, dpi: int, lang: str = "eng") -> str:
+    """Worker: render a single 0-based page and OCR it; only one bitmap is held at a time."""
+    # convert_from_path requires poppler in PATH
+    images = convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_number + 1, last_page=page_number + 1, thread_count=1
+    )
+    texts = []
+    for img in images:
+        # ensure PIL image
+        if not isinstance(img, Image.Image):
+            img = Image.fromarray(img)
+        try:
+            texts.append(pytesseract.image_to_string(img, lang=lang))
+        finally:
+            img.close()
+    return "\n".join(texts)
+
+
+class OCRPool:
+    """Bounded admission in front of a ProcessPoolExecutor, with queue-depth counters."""
+
+    def __init__(self, workers: int, max_queue: int, queue_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cond = asyncio.Condition()
+        self._pending = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._restarts = 0
+        self._total_seconds = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(f"Starting OCR pool with {self.workers} workers")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        return self._executor
+
+    def _discard_executor(self, broken: ProcessPoolExecutor) -> None:
+        """Drop a broken executor so the next job starts fresh workers (once per breakage)."""
+        if self._executor is not broken:
+            return
+        self._restarts += 1
+        logger.warning("OCR pool broken (worker died); restarting workers")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    async def _acquire(self, timeout: Optional[float] = None) -> None:
+        """Take a slot, waiting at most ``timeout`` seconds (None: as long as it takes)."""
+        async with self._cond:
+            if self._pending >= self.capacity:
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._pending < self.capacity),
+                        timeout=timeout,
+                    )
+                except asyncio.TimeoutError:
+                    self._rejected += 1
+                    raise OCRPoolBusyError(
+                        "OCR service is busy; please retry in a moment"
+                    ) from None
+                finally:
+                    self._waiting -= 1
+            self._pending += 1
+
+    async def _release(self) -> None:
+        async with self._cond:
+            self._pending -= 1
+            self._cond.notify()
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` in an OCR worker once a slot is available."""
+        await self._acquire(self.queue_timeout)
+        return await self._execute(fn, *args)
+
+    async def run_many(self, fn, arg_tuples: list[tuple]) -> list:
+        """
+        Run ``fn(*args)`` for every tuple of one document, results in order.
+
+        Only the first admission waits at most queue_timeout; once admitted, the remaining
+        jobs wait for slots without a deadline, at most ``workers`` of them at a time.
+        """
+        if not arg_tuples:
+            return []
+        await self._acquire(self.queue_timeout)
+        reserved = [True]
+        window = asyncio.Semaphore(self.workers)
+
+        async def one(args: tuple):
+            async with window:
+                if reserved[0]:
+                    reserved[0] = False
+                else:
+                    await self._acquire()
+                return await self._execute(fn, *args)
+
+        jobs = [asyncio.ensure_future(one(args)) for args in arg_tuples]
+        try:
+            return await asyncio.gather(*jobs)
+        except BaseException:
+            for job in jobs:
+                job.cancel()
+            raise
+        finally:
+            if reserved[0]:
+                await self._release()
+
+    async def _execute(self, fn, *args):
+        """Run an admitted job; releases its slot when done."""
+        start = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result = await loop.run_in_executor(executor, fn, *args)
+                    break
+                except BrokenProcessPool:
+                    self._discard_executor(executor)
+                    if attempt:
+                        raise
+            self._completed += 1
+            return result
+        except BaseException:
+            self._failed += 1
+            raise
+        finally:
+            self._total_seconds += time.monotonic() - start
+            await self._release()
+
+    def stats(self) -> dict:
+        finished = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(0, self._pending - self.workers),
+            "waiting_for_admission": self._waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "pool_restarts": self._restarts,
+            "avg_job_seconds": (self._total_seconds / finished) if finished else None,
+        }
+
+
+_ocr_pool: Optional[OCRPool] = None
+
+
+def get_ocr_pool() -> OCRPool:
+    """Get or create the shared OCR pool."""
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = OCRPool(OCR_WORKERS, OCR_MAX_QUEUE, OCR_QUEUE_TIMEOUT)
+    return _ocr_pool
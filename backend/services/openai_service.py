@@ -1,18 +1,63 @@
 from importlib import metadata
 import os
-from openai import OpenAI
+import httpx
+import openai
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-import tempfile
 from typing import Optional
 import logging
 import time
 import asyncio
-import pdfplumber
-from pdf2image import convert_from_path
-from PIL import Image
-import pytesseract
+from pdf2image import pdfinfo_from_path
 import math
 import json
+import hashlib
+
+from services.extraction_cache import (
+    EXTRACTOR_TIERS,
+    OCR_DPI,
+    OCR_MAX_PIXELS,
+    OCR_MIN_DPI,
+    OCR_MIN_PAGE_CHARS,
+    extraction_cache_key,
+    get_extraction_cache,
+)
+from services.file_staging import new_spool_file, stage_file
+from services.llm_cache import get_llm_cache, llm_cache_key, normalize_text
+from services.llm_simulator import OPENAI_SIMULATOR, SimulatedOpenAITransport
+from services.llm_rate_limit import (
+    estimate_tokens,
+    get_rate_limiter,
+    parse_retry_after,
+    retry_delay,
+)
+from services.ocr_pool import OCRPoolBusyError, get_ocr_pool, ocr_page
+from services.match_prompt import (
+    MATCH_MAX_OUTPUT_TOKENS,
+    CompiledCriteria,
+    MatchTruncatedError,
+    compile_within_budget,
+    decode_matches,
+    halve,
+    output_token_sizer,
+    prompt_settings,
+)
+from services.match_routing import (
+    conflicting_skills,
+    match_tier_stats,
+    shard_criteria,
+    skills_to_escalate,
+)
+from services.text_chunks import split_text
+from services.pdf_extraction import (
+    TEXT_ENGINES,
+    extract_pages,
+    extraction_tier_stats,
+    page_fingerprints,
+    page_sizes,
+    page_text_ok,
+    run_in_extraction_pool,
+)
 
 # Load environment variables
 load_dotenv()
@@ -21,97 +66,495 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when the match_text_to_criteria prompt or its response parsing changes; part of the
+# LLM cache key, so stale cached answers are not reused.
+MATCH_PROMPT_VERSION = "3"
+
+def _merge_classifications(results: list) -> dict:
+    """Merge per-chunk {skills, categories, summary} in chunk order, de-duplicating lists."""
+    merged = {"skills": [], "categories": [], "summary": ""}
+    for r in results:
+        if isinstance(r, dict):
+            skills = r.get("skills", [])
+            if isinstance(skills, list):
+                merged["skills"].extend(skills)
+            categories = r.get("categories", [])
+            if isinstance(categories, list):
+                merged["categories"].extend(categories)
+            summary = r.get("summary", "")
+            if summary:
+                merged["summary"] += (summary + " ")
+        else:
+            merged["summary"] += (str(r) + " ")
+
+    merged["skills"] = list(dict.fromkeys([s.strip() for s in merged["skills"] if isinstance(s, str) and s.strip()]))
+    merged["categories"] = list(dict.fromkeys([c.strip() for c in merged["categories"] if isinstance(c, str) and c.strip()]))
+    merged["summary"] = merged["summary"].strip()
+    return merged
+
+
+def _best_match_per_skill(matches: list) -> list:
+    """Reduce step: keep the highest-confidence match per rubric_skill_history_id (first wins ties)."""
+    best = {}
+    for item in matches:
+        if not isinstance(item, dict):
+            continue
+        sid = item.get("rubric_skill_history_id")
+        if sid is None:
+            continue
+        current = best.get(sid)
+        if current is None or (item.get("confidence") or 0.0) > (current.get("confidence") or 0.0):
+            best[sid] = item
+    return list(best.values())
+
+
 class OpenAIService:
     """Service for handling OpenAI API interactions."""
+
+    # Name in services.matchers.MATCHERS
+    name = "openai"
     
     def __init__(self):
         """Initialize OpenAI client with API key from environment variables."""
         api_key = os.getenv("OPENAI_API_KEY")
         logger.info("OPNAI_API_KEY loaded from environment: " + ("Yes" if api_key else "No"))
+        # The simulator answers locally, so load tests need no real key
+        if not api_key and OPENAI_SIMULATOR in ("simulate", "replay"):
+            api_key = "simulated"
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in your .env file.")
         
-        self.client = OpenAI(api_key=api_key)
+        # LLM calls are awaited on a shared, pooled HTTP client instead of pinning a thread
+        # each; OPENAI_MAX_CONCURRENCY caps how many are in flight at once
+        self.max_concurrency = max(1, int(os.getenv("OPENAI_MAX_CONCURRENCY", 16)))
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", self.max_concurrency)),
+                max_keepalive_connections=int(
+                    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", self.max_concurrency)
+                ),
+                keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 60)),
+            ),
+        )
+        # OPENAI_SIMULATOR=simulate|record|replay swaps in services.llm_simulator for load tests
+        if OPENAI_SIMULATOR != "off":
+            logger.warning("OpenAI simulator enabled: mode=%s", OPENAI_SIMULATOR)
+            transport = SimulatedOpenAITransport(OPENAI_SIMULATOR, upstream=transport)
+        self.http_client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(
+                float(os.getenv("OPENAI_TIMEOUT", 120)),
+                connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", 10)),
+            ),
+        )
+        # Retries are done in _chat_completion (through the rate limiter), not by the SDK
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", 4))
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self.http_client, max_retries=0)
+        self._llm_slots = asyncio.Semaphore(self.max_concurrency)
+        self._llm_in_flight = 0
+        self._llm_waiting = 0
+        self._llm_completed = 0
+        self._llm_failed = 0
+        self._llm_retries = 0
+        self._prompt_tokens = 0
+        self._cached_prompt_tokens = 0
+        self._completion_tokens = 0
         self.max_file_size = int(os.getenv("MAX_FILE_SIZE", 10485760))  # Default 10MB
+        # Uploads are streamed to disk in chunks of this size (default 64KB)
+        self.upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", 65536))
+        # Extraction settings live in services.extraction_cache, since they key its entries
+        self.extractor_tiers = list(EXTRACTOR_TIERS)
+        unknown = set(self.extractor_tiers) - {*TEXT_ENGINES, "ocr"}
+        if unknown:
+            raise ValueError(f"Unknown EXTRACTOR_TIERS entries: {sorted(unknown)}")
+        self.ocr_min_page_chars = OCR_MIN_PAGE_CHARS
+        self.ocr_dpi = OCR_DPI
+        self.ocr_min_dpi = OCR_MIN_DPI
+        self.ocr_max_pixels = OCR_MAX_PIXELS
         # Model for Assistants API - can be overridden via OPENAI_MODEL env variable
         # Default: "gpt-4o-mini"
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        # Max chunks of one classify_text call sent to the LLM at the same time
+        self.classify_max_parallel_chunks = max(1, int(os.getenv("CLASSIFY_MAX_PARALLEL_CHUNKS", 8)))
+        # match_text_to_criteria splits long portfolios into chunks of about this many tokens
+        # (overlapping by MATCH_CHUNK_OVERLAP_TOKENS) and matches up to
+        # MATCH_MAX_PARALLEL_CHUNKS of them at a time
+        self.match_chunk_tokens = max(200, int(os.getenv("MATCH_CHUNK_TOKENS", 1500)))
+        self.match_chunk_overlap_tokens = max(0, int(os.getenv("MATCH_CHUNK_OVERLAP_TOKENS", 100)))
+        self.match_max_parallel_chunks = max(1, int(os.getenv("MATCH_MAX_PARALLEL_CHUNKS", 8)))
+        # Matching models, cheapest first; skills whose best match scores below
+        # MATCH_ESCALATE_CONFIDENCE (or conflict across chunks) are re-run on the next
+        # tier (see services.match_routing). Default: OPENAI_MODEL only, no cascade
+        self.match_model_tiers = [
+            m.strip() for m in os.getenv("MATCH_MODEL_TIERS", "").split(",") if m.strip()
+        ] or [self.model]
+        self.match_escalate_confidence = float(os.getenv("MATCH_ESCALATE_CONFIDENCE", 0.6))
+        # Match at most this many rubric skills per request, sharding larger rubrics into
+        # concurrent requests (0: the whole rubric in one request per chunk)
+        self.match_skills_per_shard = max(0, int(os.getenv("MATCH_SKILLS_PER_SHARD", 0)))
         logger.info(f"Initializing OpenAI service with model: {self.model}")
         
-    def _ocr_from_pdf(self, pdf_path, dpi=300, lang="eng"):
-        """Synchronous helper: convert PDF to images and run pytesseract."""
-        texts = []
-        # convert_from_path requires poppler in PATH
-        images = convert_from_path(pdf_path, dpi=dpi)
-        for img in images:
-            # ensure PIL image
-            if not isinstance(img, Image.Image):
-                img = Image.fromarray(img)
-            page_text = pytesseract.image_to_string(img, lang=lang)
-            texts.append(page_text)
-        return "\n\n".join(texts)
+    async def _chat_completion(self, **kwargs):
+        """
+        ``chat.completions.create`` through the shared rate limiter and the
+        OPENAI_MAX_CONCURRENCY semaphore, retrying 429s, 5xx and connection errors with
+        jittered exponential backoff (honouring Retry-After) up to max_retries times.
+        """
+        limiter = get_rate_limiter()
+        estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated)
+            try:
+                resp = await self._gated_chat_completion(**kwargs)
+            except (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError) as e:
+                limiter.settle(estimated, 0)
+                response = getattr(e, "response", None)
+                retry_after = parse_retry_after(response.headers if response is not None else None)
+                if isinstance(e, openai.RateLimitError):
+                    limiter.pause(retry_after if retry_after is not None else retry_delay(attempt))
+                if attempt >= self.max_retries:
+                    raise
+                delay = retry_delay(attempt, retry_after)
+                logger.warning(
+                    f"OpenAI call failed ({type(e).__name__}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                self._llm_retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            usage = getattr(resp, "usage", None)
+            limiter.settle(estimated, getattr(usage, "total_tokens", None))
+            self._record_usage(usage)
+            return resp
+
+    async def _gated_chat_completion(self, **kwargs):
+        self._llm_waiting += 1
+        try:
+            await self._llm_slots.acquire()
+        finally:
+            self._llm_waiting -= 1
+        self._llm_in_flight += 1
+        try:
+            resp = await self.client.chat.completions.create(**kwargs)
+            self._llm_completed += 1
+            return resp
+        except BaseException:
+            self._llm_failed += 1
+            raise
+        finally:
+            self._llm_in_flight -= 1
+            self._llm_slots.release()
+
+    def _record_usage(self, usage) -> None:
+        if usage is None:
+            return
+        self._prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self._completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self._cached_prompt_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def llm_stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._llm_in_flight,
+            "waiting": self._llm_waiting,
+            "completed": self._llm_completed,
+            "failed": self._llm_failed,
+            "retries": self._llm_retries,
+            "prompt_tokens": self._prompt_tokens,
+            "cached_prompt_tokens": self._cached_prompt_tokens,
+            "completion_tokens": self._completion_tokens,
+            "rate_limiter": get_rate_limiter().stats(),
+            "match_output": output_token_sizer.stats(),
+        }
+
+    def _ocr_dpi_for_page(self, width_pt: float, height_pt: float) -> int:
+        """Scale DPI down for large pages so one rendered page stays under ocr_max_pixels."""
+        area_in = (width_pt / 72.0) * (height_pt / 72.0)
+        if area_in <= 0:
+            return self.ocr_dpi
+        fit_dpi = int(math.sqrt(self.ocr_max_pixels / area_in))
+        return max(self.ocr_min_dpi, min(self.ocr_dpi, fit_dpi))
+
+    async def _ocr_from_pdf(self, pdf_path, page_numbers=None, lang="eng"):
+        """
+        OCR PDF pages in the dedicated OCR pool, one rendered page per job.
+
+        Each worker holds a single page bitmap at a time, so peak memory does not grow
+        with the page count. DPI is chosen per page from its size (see _ocr_dpi_for_page).
+
+        page_numbers: 0-based pages to OCR; None means every page.
+        Returns {page_number: text}.
+
+        Raises:
+            OCRPoolBusyError: If the OCR pool stays saturated past its queue timeout
+        """
+        try:
+            sizes = await run_in_extraction_pool(page_sizes, pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not read page sizes, using {self.ocr_dpi} DPI: {e}")
+            sizes = None
+        if page_numbers is None:
+            if sizes is not None:
+                page_count = len(sizes)
+            else:
+                page_count = int((await asyncio.to_thread(pdfinfo_from_path, pdf_path))["Pages"])
+            page_numbers = range(page_count)
+
+        pages = list(page_numbers)
+        jobs = [
+            (
+                pdf_path,
+                n,
+                self._ocr_dpi_for_page(*sizes[n]) if sizes is not None and n < len(sizes) else self.ocr_dpi,
+                lang,
+            )
+            for n in pages
+        ]
+        # Admitted once per document; pages then stream through at most OCR_WORKERS at a time.
+        texts = await get_ocr_pool().run_many(ocr_page, jobs)
+        return dict(zip(pages, texts))
     
-    async def extract_text_from_pdf(self, pdf_file) -> dict:
+    async def _spool_upload(self, pdf_file) -> tuple[str, int, str]:
         """
-        Extract text from PDF file using OpenAI's file processing API.
+        Stream an upload to a temporary file in fixed-size chunks.
+
+        Aborts as soon as the running size crosses ``max_file_size`` so an oversized
+        upload is never fully buffered. Returns (temp_file_path, file_size, sha256 hex);
+        the caller owns the temp file and must remove it.
+        """
+        file_size = 0
+        digest = hashlib.sha256()
+        temp_file = new_spool_file()
+        try:
+            with temp_file:
+                while True:
+                    chunk = await pdf_file.read(self.upload_chunk_size)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if file_size > self.max_file_size:
+                        raise ValueError(
+                            f"File size exceeds maximum allowed size ({self.max_file_size} bytes)"
+                        )
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            if file_size == 0:
+                raise ValueError("File is empty")
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+        return temp_file.name, file_size, digest.hexdigest()
+
+    async def _page_fingerprints(self, pdf_path: str) -> Optional[list]:
+        try:
+            return await run_in_extraction_pool(page_fingerprints, pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not fingerprint PDF pages: {e}")
+            return None
+
+    async def _run_extractor_tier(self, tier: str, pdf_path: str, page_numbers=None) -> dict:
+        """{page_number: text} from one extractor tier; page_numbers None means every page."""
+        if tier == "ocr":
+            return await self._ocr_from_pdf(pdf_path, page_numbers)
+        texts = await extract_pages(pdf_path, page_numbers, engine=tier)
+        if page_numbers is None:
+            page_numbers = range(len(texts))
+        return dict(zip(sorted(page_numbers), texts))
+
+    async def _extract_page_texts(self, pdf_path: str, known_pages: Optional[dict] = None) -> tuple:
+        """
+        Per-page text from the extractor chain (``extractor_tiers``, by default
+        pypdf -> pdfplumber -> OCR).
+
+        Every page starts at the cheapest tier and only pages failing ``page_text_ok``
+        escalate to the next one, so digital pages never pay for layout analysis or OCR.
+
+        known_pages: {page fingerprint: text} from an earlier revision of the same
+        portfolio; pages whose fingerprint is found there are reused, not re-extracted.
+        Returns (page_texts, page_fingerprints); fingerprints is None if they could not
+        be computed.
+        """
+        known_pages = known_pages or {}
+        fingerprints = await self._page_fingerprints(pdf_path)
+        if fingerprints is not None:
+            page_texts = [known_pages.get(fp) for fp in fingerprints]
+            pending = [n for n, t in enumerate(page_texts) if t is None]
+            if known_pages:
+                logger.info(f"Reusing {len(page_texts) - len(pending)}/{len(page_texts)} unchanged pages")
+        else:
+            # Page count unknown until some tier manages to open the file.
+            page_texts = None
+            pending = None
+
+        for tier in self.extractor_tiers:
+            if pending is not None and not pending:
+                break
+            start = time.monotonic()
+            try:
+                texts = await self._run_extractor_tier(tier, pdf_path, pending)
+            except Exception as e:
+                extraction_tier_stats.record(
+                    tier,
+                    pages_attempted=len(pending or []),
+                    pages_accepted=0,
+                    seconds=time.monotonic() - start,
+                    error=True,
+                )
+                if isinstance(e, OCRPoolBusyError):
+                    raise
+                logger.warning(f"{tier} extraction failed: {e}")
+                continue
+            if page_texts is None:
+                page_texts = [None] * len(texts)
+                pending = list(range(len(texts)))
+
+            accepted = 0
+            for n, text in texts.items():
+                ok = page_text_ok(text, self.ocr_min_page_chars)
+                accepted += ok
+                # keep an accepted text, otherwise whichever attempt recovered more
+                if ok or len(text.strip()) > len((page_texts[n] or "").strip()):
+                    page_texts[n] = text
+            pending = [n for n in pending if not page_text_ok(page_texts[n] or "", self.ocr_min_page_chars)]
+            extraction_tier_stats.record(
+                tier,
+                pages_attempted=len(texts),
+                pages_accepted=accepted,
+                seconds=time.monotonic() - start,
+            )
+            if pending:
+                logger.info(f"{len(pending)}/{len(page_texts)} pages below quality after {tier}")
+
+        if page_texts is None:
+            return [], None
+        page_texts = [t or "" for t in page_texts]
+        if fingerprints is not None and len(fingerprints) != len(page_texts):
+            fingerprints = None
+        return page_texts, fingerprints
+
+    async def extract_text_from_pdf(self, pdf_file, known_pages: Optional[dict] = None) -> dict:
+        """
+        Extract text from PDF file through the tiered extractor chain (pypdf,
+        pdfplumber, OCR).
+
+        Results are cached by content hash, so re-uploading an identical file skips
+        extraction entirely.
         Args:
             pdf_file: FastAPI UploadFile object containing the PDF
+            known_pages: Optional {page fingerprint: text} of a previous revision;
+                unchanged pages are reused instead of re-extracted
             
         Returns:
-            dict: Contains 'text' (extracted text) and 'metadata' (file info)
+            dict: Contains 'text' (extracted text), 'metadata' (file info),
+            'sha256' (hex digest of the file), 'pages' (list of
+            {'fingerprint', 'text'} or None) and 'file_token' (staging token for
+            the uploaded file, see services.file_staging)
             
         Raises:
+            ValueError: If the file is empty or larger than ``max_file_size``
+            OCRPoolBusyError: If OCR is needed but the OCR pool is saturated
             Exception: If PDF processing fails
         """
         try:
-            # Read file content
-            file_content = await pdf_file.read()
-            file_size = len(file_content)
-            
-            # Validate file size
-            if file_size > self.max_file_size:
-                raise ValueError(f"File size ({file_size} bytes) exceeds maximum allowed size ({self.max_file_size} bytes)")
-            
-            if file_size == 0:
-                raise ValueError("File is empty")
-            
+            # Stream the upload to disk; oversized files are rejected mid-stream.
+            temp_file_path, file_size, file_sha256 = await self._spool_upload(pdf_file)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading uploaded PDF: {str(e)}")
+            raise Exception(f"Error: Failed to read uploaded PDF: {str(e)}")
+
+        try:
             logger.info(f"Processing PDF: {pdf_file.filename}, Size: {file_size} bytes")
-            
-            # Save file temporarily for OpenAI API
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(file_content)
-                temp_file_path = temp_file.name
-                
-            # 1) Try pdfplumber extraction (fast, preserves layout)
-            try:
-                texts = []
-                with pdfplumber.open(temp_file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text() or ""
-                        texts.append(page_text)
-                full_text = "\n\n".join(texts).strip()
-            except Exception as e:
-                logger.warning(f"pdfplumber extraction failed: {e}")
-                full_text = ""
-                
-            # 2) Evaluate quality: if too short or mostly whitespace, fallback to OCR
-            quality_ok = len(full_text) > 10  # simple threshold; tune as needed
-            if not quality_ok:
-                logger.info("Low-quality text detected; running OCR fallback")
-                ocr_text = await asyncio.to_thread(self._ocr_from_pdf, temp_file_path)
-                # prefer OCR text if longer
-                if len(ocr_text) > len(full_text):
-                    full_text = ocr_text
-                    
+
+            cache = get_extraction_cache()
+            cache_key = extraction_cache_key(file_sha256)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Extraction cache hit for {file_sha256}")
+                full_text = cached["text"]
+                page_texts = cached["pages"]
+                fingerprints = cached.get("fingerprints")
+            else:
+                page_texts, fingerprints = await self._extract_page_texts(temp_file_path, known_pages)
+                full_text = "\n\n".join(page_texts).strip()
+                if full_text:
+                    await asyncio.to_thread(
+                        cache.set,
+                        cache_key,
+                        {"text": full_text, "pages": page_texts, "fingerprints": fingerprints},
+                    )
+
             if not full_text:
                 raise Exception("Failed to extract text from PDF")
 
+            # Hand the spooled file to staging (a rename); its bytes never enter memory.
+            file_token = stage_file(
+                temp_file_path, sha256=file_sha256, size=file_size, filename=pdf_file.filename
+            )
+
             metadata = {"filename": pdf_file.filename, "size": file_size}
-            return {"text": full_text, "metadata": metadata}
+            return {
+                "text": full_text,
+                "metadata": metadata,
+                "sha256": file_sha256,
+                "pages": (
+                    [{"fingerprint": fp, "text": t} for fp, t in zip(fingerprints, page_texts)]
+                    if fingerprints is not None
+                    else None
+                ),
+                "file_token": file_token,
+            }
                     
+        except OCRPoolBusyError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise Exception(f"Error: Failed to extract text from PDF: {str(e)}")
+        finally:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+
+    async def _classify_chunk(
+        self, i: int, n_chunks: int, chunk: str, task_prompt: Optional[str]
+    ) -> Optional[dict]:
+        """Classify one chunk; returns None (chunk skipped) when the call fails."""
+        logger.info(f"Processing chunk {i+1}/{n_chunks}, length: {len(chunk)}")
+
+        system_msg = {"role": "system", "content": "You are an assistant that extracts skills, categories and a short summary from resume/portfolio text. Return valid JSON only."}
+        user_content = (task_prompt or
+                        "Extract a JSON object with keys: skills (array of strings), categories (array), summary (short string). "
+                        "Only output valid JSON. Do not include extra commentary.\n\n"
+                        f"Text:\n{chunk}")
+        user_msg = {"role": "user", "content": user_content}
+
+        try:
+            resp = await self._chat_completion(
+                model=self.model,
+                messages=[system_msg, user_msg],
+                temperature=0.2,  # slightly higher than 0 for stability
+                max_tokens=500
+            )
+            logger.info(f"OpenAI response received for chunk {i+1}")
+
+            # FIX: Use .content (object attr) not ["content"] (dict)
+            content = resp.choices[0].message.content
+            logger.info(f"Raw response: {content[:200]}")  # log first 200 chars
+
+        except Exception as e:
+            logger.error(f"OpenAI call failed for chunk {i+1}: {e}")
+            return None  # skip this chunk, don't crash
+
+        # Try parse JSON
+        try:
+            parsed = json.loads(content)
+            logger.info(f"Successfully parsed JSON for chunk {i+1}")
+            return parsed
+        except json.JSONDecodeError as je:
+            logger.warning(f"JSON parse failed for chunk {i+1}: {je}. Raw: {content[:100]}")
+            return {"raw": content}  # keep raw response
 
     async def classify_text(self, text: str, task_prompt: str = None) -> dict:
         """
@@ -125,70 +568,25 @@ class OpenAIService:
 
         max_chunk_chars = 3000
         chunks = [text[i:i+max_chunk_chars] for i in range(0, len(text), max_chunk_chars)]
-        results = []
-        
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Processing chunk {i+1}/{len(chunks)}, length: {len(chunk)}")
-            
-            system_msg = {"role": "system", "content": "You are an assistant that extracts skills, categories and a short summary from resume/portfolio text. Return valid JSON only."}
-            user_content = (task_prompt or
-                            "Extract a JSON object with keys: skills (array of strings), categories (array), summary (short string). "
-                            "Only output valid JSON. Do not include extra commentary.\n\n"
-                            f"Text:\n{chunk}")
-            user_msg = {"role": "user", "content": user_content}
 
-            try:
-                # Call OpenAI (blocking, so wrap in thread)
-                resp = await asyncio.to_thread(
-                    self.client.chat.completions.create,
-                    model=self.model,
-                    messages=[system_msg, user_msg],
-                    temperature=0.2,  # slightly higher than 0 for stability
-                    max_tokens=500
-                )
-                logger.info(f"OpenAI response received for chunk {i+1}")
-                
-                # FIX: Use .content (object attr) not ["content"] (dict)
-                content = resp.choices[0].message.content
-                logger.info(f"Raw response: {content[:200]}")  # log first 200 chars
-                
-            except Exception as e:
-                logger.error(f"OpenAI call failed for chunk {i+1}: {e}")
-                continue  # skip this chunk, don't crash
-            
-            # Try parse JSON
-            try:
-                parsed = json.loads(content)
-                logger.info(f"Successfully parsed JSON for chunk {i+1}")
-                results.append(parsed)
-            except json.JSONDecodeError as je:
-                logger.warning(f"JSON parse failed for chunk {i+1}: {je}. Raw: {content[:100]}")
-                results.append({"raw": content})  # keep raw response
+        # Chunks are classified concurrently (at most classify_max_parallel_chunks per call);
+        # gather keeps results in chunk order, so the merge below is deterministic.
+        fan_out = asyncio.Semaphore(self.classify_max_parallel_chunks)
+
+        async def classify_chunk(i: int, chunk: str):
+            async with fan_out:
+                return await self._classify_chunk(i, len(chunks), chunk, task_prompt)
+
+        chunk_results = await asyncio.gather(
+            *(classify_chunk(i, chunk) for i, chunk in enumerate(chunks))
+        )
+        results = [r for r in chunk_results if r is not None]
 
         if not results:
             logger.warning("No results collected from any chunk")
             return {"skills": [], "categories": [], "summary": "No results from OpenAI"}
 
-        # Merge results
-        merged = {"skills": [], "categories": [], "summary": ""}
-        for r in results:
-            if isinstance(r, dict):
-                skills = r.get("skills", [])
-                if isinstance(skills, list):
-                    merged["skills"].extend(skills)
-                categories = r.get("categories", [])
-                if isinstance(categories, list):
-                    merged["categories"].extend(categories)
-                summary = r.get("summary", "")
-                if summary:
-                    merged["summary"] += (summary + " ")
-            else:
-                merged["summary"] += (str(r) + " ")
-
-        merged["skills"] = list(dict.fromkeys([s.strip() for s in merged["skills"] if isinstance(s, str) and s.strip()]))
-        merged["categories"] = list(dict.fromkeys([c.strip() for c in merged["categories"] if isinstance(c, str) and c.strip()]))
-        merged["summary"] = merged["summary"].strip()
-        
+        merged = _merge_classifications(results)
         logger.info(f"Final merged result: {len(merged['skills'])} skills, {len(merged['categories'])} categories, summary length: {len(merged['summary'])}")
         return merged
 
@@ -205,8 +603,7 @@ class OpenAIService:
 
                     Return JSON: {{"level_id": <int>, "confidence": <0-1>, "reasoning": "<string>"}}"""
         
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self._chat_completion(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3
@@ -215,90 +612,242 @@ class OpenAIService:
 
     async def match_text_to_criteria(self, text: str, classification: dict, criteria: list) -> list:
         """
-        Ask the model to match the provided text/classification to rubric criteria.
-
-        Returns a list of match objects with keys:
-          - criteria_history_id (int, optional but recommended)
-          - rubric_skill_history_id (int, required)
-          - level_history_id (int, optional; can be inferred from criteria_history_id)
-          - matched_text (string)  # snippet or summary that matched
-          - confidence (float 0.0-1.0)
-          - matched_from (string)  # e.g., skill name or 'text'
+        Cached front of _match_text_to_criteria (see services.llm_cache); the call is made
+        at temperature 0, so an identical request is answered from the cache.
         """
         if not criteria:
             return []
+        cache = get_llm_cache()
+        cache_key = llm_cache_key(
+            model=self._match_route_label(),
+            prompt_version=MATCH_PROMPT_VERSION,
+            text=normalize_text(text),
+            classification=classification,
+            criteria=criteria,
+            settings=self._match_cache_settings(),
+        )
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            logger.info("match_text_to_criteria answered from LLM cache")
+            return cached
+        result = await self._match_text_to_criteria(text, classification, criteria)
+        # A partial result (some requests failed) is returned but never cached.
+        if isinstance(result, dict) and not result.get("failed_skills"):
+            await asyncio.to_thread(cache.set, cache_key, result)
+        return result
 
-        # Build prompt
-        system_msg = {"role": "system", "content": "You are an assistant that matches portfolio content of text and implication with passing rubric criteria. Output valid JSON only."}
-        user_content = (
-            "Given the portfolio text and a list of rubric criteria, find which parts of the text or extracted skills match each criteria.\n"
-            "Return a JSON object with keys: \n"
-            "  - classification: { skills: [...], categories: [...], summary: '...' }\n"
-            "  - matches: an array of objects with keys: criteria_history_id, rubric_skill_history_id, level_history_id, matched_text, confidence (0-1), matched_from\n"
-            "If multiple criteria match the same text, include multiple objects. If nothing matches, return an object with empty arrays.\n\n"
-            f"Classification hint (if available):\n{json.dumps(classification, ensure_ascii=False, indent=2)}\n\n"
-            f"Criteria list:\n{json.dumps(criteria, ensure_ascii=False, indent=2)}\n\n"
-            f"Portfolio text (full):\n{text[:4000]}\n\n"
-            "Notes:\n- matched_text should be the exact snippet from the portfolio text when possible, else a short paraphrase.\n"
-            "- confidence should be a number between 0 and 1.\n"
-            "- matched_from should indicate which extracted skill or 'text' if matched from free text.\n"
-            "Only output valid JSON (an object). Do not include extra commentary."
+    def _match_cache_settings(self) -> dict:
+        """Settings that change the prompts sent for a match; a change must miss the cache."""
+        return {
+            **prompt_settings(),
+            "chunk_tokens": self.match_chunk_tokens,
+            "chunk_overlap_tokens": self.match_chunk_overlap_tokens,
+            "skills_per_shard": self.match_skills_per_shard,
+        }
+
+    def _match_route_label(self) -> str:
+        """Model part of the match cache key: the tier chain and its escalation threshold."""
+        if len(self.match_model_tiers) == 1:
+            return self.match_model_tiers[0]
+        return ">".join(self.match_model_tiers) + f"@{self.match_escalate_confidence}"
+
+    async def _match_text_to_criteria(self, text: str, classification: dict, criteria: list) -> dict:
+        """
+        Cascaded matching over match_model_tiers (see services.match_routing).
+
+        Every skill is matched on the first tier. Skills whose best match is below
+        match_escalate_confidence, or that chunks matched at different levels, are re-run
+        on the next tier with only their criteria, and that tier's result replaces theirs.
+        Skills whose requests failed on one tier are retried on the next; a skill the next
+        tier fails on keeps its earlier answer. The classification comes from the first
+        tier; ``failed_skills`` lists the skills no tier could finish.
+        """
+        models = self.match_model_tiers
+        result, conflicts = await self._match_with_model(models[0], text, classification, criteria)
+        failed = set(result["failed_skills"])
+        pending = None
+        for model in models[1:]:
+            escalate = skills_to_escalate(result["matches"], conflicts, self.match_escalate_confidence)
+            if pending is not None:
+                escalate &= pending
+            escalate |= failed
+            if not escalate:
+                break
+            logger.info(f"match_text_to_criteria: escalating {len(escalate)} skills to {model}")
+            subset = [c for c in criteria if c.get("rubric_skill_history_id") in escalate]
+            stronger, conflicts = await self._match_with_model(
+                model, text, classification, subset, escalated=True
+            )
+            # A skill the stronger tier failed on keeps its earlier answer (or the better of
+            # both), and stays failed only if no tier has finished it.
+            stronger_failed = set(stronger["failed_skills"])
+            replaced = escalate - stronger_failed
+            kept = [m for m in result["matches"] if m.get("rubric_skill_history_id") not in replaced]
+            failed &= stronger_failed
+            result = {
+                "classification": result["classification"],
+                "matches": _best_match_per_skill(kept + stronger["matches"]),
+                "failed_skills": sorted(failed, key=str),
+            }
+            pending = escalate
+        return result
+
+    async def _match_with_model(
+        self, model: str, text: str, classification: dict, criteria: list, escalated: bool = False
+    ) -> tuple[dict, set]:
+        """
+        Map-reduce matching over the whole portfolio on one model.
+
+        Criteria are split into shards of match_skills_per_shard skills (one shard when 0)
+        and each shard is compiled into a compact table (services.match_prompt), split
+        further when the table alone would crowd the text out of the budget. The text is
+        split into chunks that fit MATCH_PROMPT_TOKEN_BUDGET next to that table (at most
+        match_chunk_tokens each), and every shard/chunk pair is matched concurrently (at
+        most match_max_parallel_chunks at a time, and within the global
+        OPENAI_MAX_CONCURRENCY). Then the best match per rubric_skill_history_id is kept and
+        the first answering shard's chunk classifications are merged in order.
+
+        A failed request (after retries) does not discard the others: the skills of its
+        shard are listed in ``failed_skills`` and the remaining matches are kept. Only when
+        every request fails is the error raised.
+
+        Also returns the skills whose chunks disagreed on the level.
+        """
+        fan_out = asyncio.Semaphore(self.match_max_parallel_chunks)
+        skills = len({c.get("rubric_skill_history_id") for c in criteria})
+        jobs = []
+        compiled_shards = [
+            compiled
+            for shard in shard_criteria(criteria, self.match_skills_per_shard)
+            for compiled in compile_within_budget(shard, classification)
+        ]
+        for shard_no, compiled in enumerate(compiled_shards):
+            chunk_tokens = compiled.text_token_allowance(self.match_chunk_tokens, classification)
+            chunks = split_text(text, chunk_tokens, self.match_chunk_overlap_tokens) or [""]
+            for i, chunk in enumerate(chunks):
+                part = f"part {i + 1} of {len(chunks)}" if len(chunks) > 1 else "full"
+                jobs.append((shard_no, compiled, chunk, part))
+
+        async def match_job(compiled: CompiledCriteria, chunk: str, part: str):
+            async with fan_out:
+                return await self._match_chunk_to_criteria(chunk, compiled, classification, part, model)
+
+        if len(jobs) > 1:
+            logger.info(
+                f"match_text_to_criteria: {len(text)} chars, {skills} skills in {len(jobs)} requests"
+            )
+        start = time.monotonic()
+        outcomes = await asyncio.gather(
+            *(match_job(c, chunk, part) for _, c, chunk, part in jobs), return_exceptions=True
         )
-        user_msg = {"role": "user", "content": user_content}
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+                raise outcome
+        done = [(job, r) for job, r in zip(jobs, outcomes) if not isinstance(r, Exception)]
+        failed = [(job, e) for job, e in zip(jobs, outcomes) if isinstance(e, Exception)]
+        failed_skills = {
+            c.get("rubric_skill_history_id")
+            for (_, compiled, *_), _e in failed
+            for c in compiled.by_local_id.values()
+        }
 
-        try:
-            resp = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=self.model,
-                messages=[system_msg, user_msg],
-                temperature=0.0,
-                max_tokens=1500
+        results = [r for _, r in done]
+        matches = _best_match_per_skill([m for r in results for m in r["matches"]])
+        match_tier_stats.record(
+            model,
+            calls=len(jobs),
+            skills=skills,
+            skills_matched=len(matches),
+            seconds=time.monotonic() - start,
+            escalated=escalated,
+            error=bool(failed),
+        )
+        if not done:
+            raise failed[0][1]
+        if failed:
+            logger.warning(
+                f"match_text_to_criteria: {len(failed)}/{len(jobs)} requests failed on {model} "
+                f"({failed[0][1]}); {len(failed_skills)} skills incomplete"
             )
-            content = resp.choices[0].message.content
-            logger.info(f"match_text_to_criteria response length: {len(content)}")
-        except Exception as e:
-            logger.error(f"OpenAI call failed in match_text_to_criteria: {e}")
-            raise
 
-        # Parse JSON
+        # Every shard sees the same text; one shard's classifications describe it fully.
+        first_shard = min(shard_no for (shard_no, *_), _ in done)
+        classifications = [r["classification"] for (shard_no, *_), r in done if shard_no == first_shard]
+        result = {
+            "classification": _merge_classifications(classifications),
+            "matches": matches,
+            "failed_skills": sorted(failed_skills, key=str),
+        }
+        return result, conflicting_skills(r["matches"] for r in results)
+
+    async def _match_chunk_to_criteria(
+        self,
+        text: str,
+        compiled: CompiledCriteria,
+        classification: dict,
+        part: str = "full",
+        model: Optional[str] = None,
+    ) -> dict:
+        """
+        Ask the model to match one chunk of portfolio text to the compiled criteria.
+
+        Returns {"classification": {...}, "matches": [...]}, each match with keys:
+          - criteria_history_id (int)
+          - rubric_skill_history_id (int)
+          - level_history_id (int)
+          - matched_text (string)  # short snippet that matched
+          - confidence (float 0.0-1.0)
+          - matched_from (string)  # 'text'
+        """
+        max_tokens = compiled.max_output_tokens()
+        while True:
+            try:
+                resp = await self._chat_completion(
+                    model=model or self.model,
+                    messages=compiled.messages(text, classification, part),
+                    temperature=0.0,
+                    max_tokens=max_tokens,
+                )
+                content = resp.choices[0].message.content
+                logger.info(f"match_text_to_criteria response length: {len(content)}")
+            except Exception as e:
+                logger.error(f"OpenAI call failed in match_text_to_criteria: {e}")
+                raise
+            if getattr(resp.choices[0], "finish_reason", None) != "length":
+                usage = getattr(resp, "usage", None)
+                output_token_sizer.record(len(compiled.by_local_id), getattr(usage, "completion_tokens", None))
+                break
+            # Truncated JSON: retry with a larger cap, then with half the skills per request.
+            output_token_sizer.truncated += 1
+            if max_tokens < MATCH_MAX_OUTPUT_TOKENS:
+                max_tokens = min(MATCH_MAX_OUTPUT_TOKENS, max_tokens * 2)
+                logger.warning(f"match_text_to_criteria answer truncated; retrying with max_tokens={max_tokens}")
+                continue
+            halves = halve(compiled)
+            if len(halves) == 1:
+                raise MatchTruncatedError(
+                    f"match answer for one skill exceeds MATCH_MAX_OUTPUT_TOKENS={MATCH_MAX_OUTPUT_TOKENS}"
+                )
+            logger.warning(f"match_text_to_criteria answer truncated at the cap; splitting into {len(halves)}")
+            results = await asyncio.gather(
+                *(self._match_chunk_to_criteria(text, h, classification, part, model) for h in halves)
+            )
+            return {
+                "classification": results[0]["classification"],
+                "matches": [m for r in results for m in r["matches"]],
+            }
+
         try:
             parsed = json.loads(content)
-            # Expect top-level object with 'classification' and 'matches'
-            if isinstance(parsed, dict):
-                matches = parsed.get("matches") or []
-                # normalize confidence
-                for item in matches:
-                    if "confidence" in item:
-                        try:
-                            item["confidence"] = float(item["confidence"])
-                        except Exception:
-                            item["confidence"] = 0.0
-                classification_out = parsed.get("classification") or {"skills": [], "categories": [], "summary": ""}
-                return {"classification": classification_out, "matches": matches}
-            # older fallback: if model returned array directly
-            if isinstance(parsed, list):
-                for item in parsed:
-                    if "confidence" in item:
-                        try:
-                            item["confidence"] = float(item["confidence"])
-                        except Exception:
-                            item["confidence"] = 0.0
-                return {"classification": {"skills": [], "categories": [], "summary": ""}, "matches": parsed}
-            # otherwise wrap it
-            logger.warning("match_text_to_criteria returned unexpected JSON; wrapping into object")
-            return {"classification": {"skills": [], "categories": [], "summary": ""}, "matches": [parsed]}
         except json.JSONDecodeError as je:
             logger.error(f"JSON parse failed in match_text_to_criteria: {je}. Raw: {content[:200]}")
-            # As a fallback, attempt to extract a JSON substring
-            start = content.find("[")
-            end = content.rfind("]")
-            if start != -1 and end != -1 and end > start:
-                try:
-                    parsed = json.loads(content[start:end+1])
-                    return parsed
-                except Exception:
-                    logger.error("Fallback JSON extraction failed")
-            raise
+            # As a fallback, attempt to extract a JSON object substring
+            start = content.find("{")
+            end = content.rfind("}")
+            if start == -1 or end <= start:
+                raise
+            parsed = json.loads(content[start:end+1])
+        return decode_matches(compiled, parsed)
 
 # Create a singleton instance
 _openai_service: Optional[OpenAIService] = None
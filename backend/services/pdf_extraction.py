@@ -0,0 +1,249 @@
+"""
+Per-page PDF text extraction fanned out to a process pool.
+
+Two text engines are available: "pypdf" (plain text pull, fast) and "pdfplumber"
+(layout analysis, several times slower). Both are CPU-bound, so pages are split into
+contiguous ranges and parsed in worker processes; results are reassembled in page order.
+The asyncio loop only awaits the futures.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import pdfplumber
+from pypdf import PdfReader
+from pypdf.generic import DictionaryObject, StreamObject
+
+from services.extraction_cache import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for text extraction (default: one per core)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+# Pages handed to a worker per task; larger ranges amortise re-opening the PDF
+PDF_EXTRACT_PAGES_PER_TASK = max(1, int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", 8)))
+
+
+TEXT_ENGINES = ("pypdf", "pdfplumber")
+
+
+def count_pages(pdf_path: str, engine: str = "pdfplumber") -> int:
+    if engine == "pypdf":
+        return len(PdfReader(pdf_path).pages)
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def page_text_ok(text: str, min_chars: int) -> bool:
+    """
+    Quality heuristic deciding whether a tier's page text is good enough to keep.
+
+    Rejects near-empty pages (scans) and text dominated by unmapped glyphs, which pypdf
+    emits as U+FFFD and pdfplumber as "(cid:N)" when a font lacks a Unicode map.
+    """
+    stripped = text.strip()
+    if len(stripped) < min_chars:
+        return False
+    bad = stripped.count("\ufffd") + stripped.count("(cid:") * 6
+    if bad / len(stripped) > 0.1:
+        return False
+    visible = sum(1 for ch in stripped if ch.isprintable() or ch.isspace())
+    return visible / len(stripped) >= 0.9
+
+
+def page_sizes(pdf_path: str) -> list[tuple[float, float]]:
+    """(width, height) in PDF points for every page, read from the page boxes only."""
+    reader = PdfReader(pdf_path)
+    return [(float(p.cropbox.width), float(p.cropbox.height)) for p in reader.pages]
+
+
+def _hash_resources(resources, digest, seen: set) -> None:
+    """Feed fonts and XObjects (images, forms) referenced by a page into ``digest``."""
+    resources = resources.get_object() if resources is not None else None
+    if not isinstance(resources, DictionaryObject):
+        return
+    fonts = resources.get("/Font")
+    fonts = fonts.get_object() if fonts is not None else {}
+    for name in sorted(fonts):
+        font = fonts[name].get_object()
+        digest.update(f"{name}:{font.get('/BaseFont')}".encode())
+        to_unicode = font.get("/ToUnicode")
+        if to_unicode is not None:
+            digest.update(to_unicode.get_object().get_data())
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    for name in sorted(xobjects):
+        ref = xobjects[name]
+        key = getattr(ref, "idnum", None)
+        if key is not None:
+            if key in seen:
+                digest.update(f"{name}:seen:{key}".encode())
+                continue
+            seen.add(key)
+        xobj = ref.get_object()
+        digest.update(name.encode())
+        if isinstance(xobj, StreamObject):
+            try:
+                digest.update(xobj.get_data())
+            except Exception:
+                digest.update(xobj._data or b"")
+            if xobj.get("/Subtype") == "/Form":
+                _hash_resources(xobj.get("/Resources"), digest, seen)
+
+
+def page_fingerprints(pdf_path: str) -> list[str]:
+    """
+    SHA-256 per page over its content stream, page box, rotation, fonts and XObjects.
+
+    Pages with the same fingerprint extract to the same text, so a revised upload only
+    needs to re-extract pages whose fingerprint changed. EXTRACTOR_VERSION is mixed in so
+    stored page text is not reused across extractor changes.
+    """
+    reader = PdfReader(pdf_path)
+    fingerprints = []
+    for page in reader.pages:
+        digest = hashlib.sha256(f"v{EXTRACTOR_VERSION}".encode())
+        digest.update(repr([float(x) for x in page.cropbox]).encode())
+        digest.update(str(page.get("/Rotate", 0)).encode())
+        contents = page.get_contents()
+        if contents is not None:
+            digest.update(contents.get_data())
+        _hash_resources(page.get("/Resources"), digest, set())
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int, engine: str = "pdfplumber") -> list[str]:
+    """Worker: return the text of pages [start, stop) (0-based), one entry per page."""
+    texts: list[str] = []
+    if engine == "pypdf":
+        reader = PdfReader(pdf_path)
+        for page in reader.pages[start:stop]:
+            try:
+                texts.append(page.extract_text() or "")
+            except Exception:
+                # one malformed page should only escalate that page
+                texts.append("")
+        return texts
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+    return texts
+
+
+def _page_ranges(page_numbers: list[int]) -> list[tuple[int, int]]:
+    """Group sorted page numbers into [start, stop) runs of at most PDF_EXTRACT_PAGES_PER_TASK."""
+    ranges: list[tuple[int, int]] = []
+    for n in page_numbers:
+        if ranges and ranges[-1][1] == n and n - ranges[-1][0] < PDF_EXTRACT_PAGES_PER_TASK:
+            ranges[-1] = (ranges[-1][0], n + 1)
+        else:
+            ranges.append((n, n + 1))
+    return ranges
+
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Get or create the shared text extraction process pool."""
+    global _extraction_pool
+    if _extraction_pool is None:
+        logger.info(f"Starting PDF extraction pool with {PDF_EXTRACT_WORKERS} workers")
+        _extraction_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _extraction_pool
+
+
+_extraction_pool_restarts = 0
+
+
+def extraction_pool_restarts() -> int:
+    """How often the extraction pool was replaced after a worker died (this process)."""
+    return _extraction_pool_restarts
+
+
+async def run_in_extraction_pool(fn, *args):
+    """
+    Run ``fn(*args)`` in the extraction pool. A dead worker breaks the whole executor, so
+    it is replaced and the job retried once; other jobs keep working either way.
+    """
+    global _extraction_pool, _extraction_pool_restarts
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_extraction_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            if _extraction_pool is pool:
+                _extraction_pool_restarts += 1
+                logger.warning("PDF extraction pool broken (worker died); restarting workers")
+                pool.shutdown(wait=False, cancel_futures=True)
+                _extraction_pool = None
+            if attempt:
+                raise
+
+
+async def extract_pages(
+    pdf_path: str, page_numbers: Optional[list[int]] = None, engine: str = "pdfplumber"
+) -> list[str]:
+    """
+    Extract text for pages of ``pdf_path`` with ``engine`` without blocking the event loop.
+
+    page_numbers: 0-based pages to extract; None means every page.
+    Returns one string per requested page, in page order.
+    """
+    if page_numbers is None:
+        page_count = await run_in_extraction_pool(count_pages, pdf_path, engine)
+        page_numbers = list(range(page_count))
+    ranges = _page_ranges(sorted(set(page_numbers)))
+    chunks = await asyncio.gather(
+        *(
+            run_in_extraction_pool(extract_page_range, pdf_path, start, stop, engine)
+            for start, stop in ranges
+        )
+    )
+    by_page = {
+        start + i: text
+        for (start, _), chunk in zip(ranges, chunks)
+        for i, text in enumerate(chunk)
+    }
+    return [by_page.get(n, "") for n in sorted(set(page_numbers))]
+
+
+class ExtractionTierStats:
+    """Per-tier counters: calls, pages attempted/accepted (hit rate) and latency."""
+
+    def __init__(self):
+        self._tiers: dict[str, dict] = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "pages_attempted": 0, "pages_accepted": 0, "total_seconds": 0.0}
+        )
+
+    def record(self, tier: str, *, pages_attempted: int, pages_accepted: int, seconds: float, error: bool = False) -> None:
+        t = self._tiers[tier]
+        t["calls"] += 1
+        t["errors"] += int(error)
+        t["pages_attempted"] += pages_attempted
+        t["pages_accepted"] += pages_accepted
+        t["total_seconds"] += seconds
+
+    def stats(self) -> dict:
+        out = {}
+        for tier, t in self._tiers.items():
+            out[tier] = {
+                **t,
+                "hit_rate": (t["pages_accepted"] / t["pages_attempted"]) if t["pages_attempted"] else None,
+                "avg_seconds_per_call": (t["total_seconds"] / t["calls"]) if t["calls"] else None,
+                "avg_seconds_per_page": (t["total_seconds"] / t["pages_attempted"]) if t["pages_attempted"] else None,
+            }
+        return out
+
+
+extraction_tier_stats = ExtractionTierStats()
+
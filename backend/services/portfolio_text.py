@@ -0,0 +1,24 @@
+"""
+Compressed storage for a portfolio's extracted text.
+
+Portfolio.text_compressed holds the UTF-8 text as a zlib stream so re-evaluation can
+run server-side without the client resending the text. Extracted text compresses
+roughly 3-5x.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+
+# zlib level 1-9; 6 is zlib's default speed/size trade-off
+PORTFOLIO_TEXT_COMPRESS_LEVEL = int(os.getenv("PORTFOLIO_TEXT_COMPRESS_LEVEL", 6))
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), PORTFOLIO_TEXT_COMPRESS_LEVEL)
+
+
+def decompress_text(data: bytes | None) -> str | None:
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
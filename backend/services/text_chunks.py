@@ -0,0 +1,68 @@
+"""
+Token-budgeted splitting of portfolio text for per-chunk LLM calls.
+
+Token counts are estimated per script, so no tokenizer is needed: ASCII text (English,
+code) averages about CHARS_PER_TOKEN characters per token, while Thai and other non-Latin
+scripts cost about a token per character, so every non-ASCII character counts as one.
+Chunks break at paragraph, line or word boundaries where possible and overlap slightly so
+evidence spanning a boundary is seen whole by at least one chunk.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# ASCII characters per token; the estimate's unit is 1/CHARS_PER_TOKEN of a token
+CHARS_PER_TOKEN = 4
+
+
+def _units(text: str) -> int:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars + (len(text) - ascii_chars) * CHARS_PER_TOKEN
+
+
+def estimate_text_tokens(text: str) -> int:
+    return (_units(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> list[str]:
+    """Split ``text`` into chunks of at most ``max_tokens`` (estimated) tokens each."""
+    text = text.strip()
+    max_units = max(1, max_tokens * CHARS_PER_TOKEN)
+    overlap_units = max(0, min(overlap_tokens * CHARS_PER_TOKEN, max_units // 2))
+    if _units(text) <= max_units:
+        return [text] if text else []
+
+    # prefix[i]: estimate units of text[:i]
+    prefix = [0, *accumulate(1 if ord(ch) < 128 else CHARS_PER_TOKEN for ch in text)]
+
+    def end_within(start: int, units: int) -> int:
+        """Largest end with text[start:end] costing at most ``units`` (at least one char)."""
+        return max(start + 1, bisect_right(prefix, prefix[start] + units) - 1)
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = end_within(start, max_units)
+        if end < len(text):
+            # Prefer the last paragraph, then line, then word break in the second half.
+            floor = end_within(start, max_units // 2)
+            for sep in ("\n\n", "\n", " "):
+                cut = text.rfind(sep, floor, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = end
+        if overlap_units:
+            next_start = bisect_left(prefix, prefix[end] - overlap_units)
+            # Start the overlap on a word boundary.
+            space = text.find(" ", next_start, end)
+            if space != -1:
+                next_start = space + 1
+        start = max(next_start, start + 1)
+    return chunks
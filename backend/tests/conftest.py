@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Tests import the backend packages (services, api, ...) the way main.py does.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Module-level settings are read at import time, so point every store at a scratch
+# directory (and a throwaway SQLite database) before any backend module is imported.
+_SCRATCH = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_SCRATCH / 'test.db'}"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["CACHE_DIR"] = str(_SCRATCH / "cache")
+os.environ["BLOB_STORE_DIR"] = str(_SCRATCH / "blobs")
+os.environ["STAGING_DIR"] = str(_SCRATCH / "staging")
+os.environ["OPENAI_CASSETTE_DIR"] = str(_SCRATCH / "cassettes")
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    import models  # noqa: F401
+    from database import Base, engine
+
+    Base.metadata.create_all(engine)
+    return main.app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(app):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def rubric(db):
+    """A student and a snapshotted rubric with three skills of two levels each."""
+    import models
+    from services.rubric_snapshot import snapshot_live_rubric_to_history
+
+    now = datetime.utcnow()
+    user = models.User(
+        name="student", email=f"s{now.timestamp()}@example.com", password="x", role="student",
+        created_at=now, updated_at=now,
+    )
+    rubric = models.RubricScore(name="Rubric", created_at=now, updated_at=now)
+    db.add_all([user, rubric])
+    db.flush()
+    levels = [models.Level(rubric_id=rubric.id, rank=rank, description=f"L{rank}") for rank in (1, 2)]
+    skills = [
+        models.RubricSkill(rubric_id=rubric.id, display_order=n, name=name)
+        for n, name in enumerate(["Python programming", "Teamwork", "Database design"])
+    ]
+    db.add_all(levels + skills)
+    db.flush()
+    for skill in skills:
+        for level in levels:
+            db.add(
+                models.Criteria(
+                    rubric_skill_id=skill.id,
+                    level_id=level.id,
+                    description=f"{skill.name} at level {level.rank}",
+                )
+            )
+    db.commit()
+    snapshot_live_rubric_to_history(db, rubric.id)
+    db.commit()
+    return {"rubric_id": rubric.id, "user_id": user.id}
@@ -0,0 +1,25 @@
+import os
+import time
+
+from services import extraction_cache
+from services.disk_cache import EVICT_LOW_WATER, DiskCache
+
+
+def test_eviction_trims_to_low_water_mark(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1000)
+    value = "x" * 90  # ~92 bytes per entry
+    for n in range(10):
+        cache.set(f"{n:02d}key", value)
+        path = cache._path(f"{n:02d}key")
+        os.utime(path, (time.time() - 100 + n, time.time() - 100 + n))
+    cache.set("10key", value)
+
+    assert cache.stats()["size_bytes"] <= 1000 * EVICT_LOW_WATER
+    assert cache.get("00key") is None
+    assert cache.get("10key") == value
+
+
+def test_extraction_key_depends_on_settings(monkeypatch):
+    before = extraction_cache.extraction_cache_key("ab" * 32)
+    monkeypatch.setattr(extraction_cache, "OCR_DPI", 200)
+    assert extraction_cache.extraction_cache_key("ab" * 32) != before
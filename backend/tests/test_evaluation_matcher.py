@@ -0,0 +1,68 @@
+import pytest
+
+from services import matchers
+
+
+class FakeLLM:
+    """Matches the first criterion of every skill."""
+
+    async def match_text_to_criteria(self, text, classification, criteria):
+        first = {}
+        for c in criteria:
+            first.setdefault(c["rubric_skill_history_id"], c)
+        return {
+            "classification": {"skills": ["python"], "categories": [], "summary": "LLM summary"},
+            "matches": [{**c, "confidence": 0.9, "matched_from": "text"} for c in first.values()],
+        }
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setitem(matchers.MATCHERS, "openai", FakeLLM)
+
+
+def _run(client, rubric, **body):
+    return client.post(
+        "/ai_evaluation/run",
+        json={"rubric_id": rubric["rubric_id"], "user_id": rubric["user_id"], **body},
+    )
+
+
+def test_lexical_preview_does_not_replace_llm_evaluation(client, db, rubric, fake_llm):
+    import models
+
+    llm = _run(client, rubric, text="Python programming in a team", matcher="openai")
+    assert llm.status_code == 200
+    llm = llm.json()
+    assert llm["matcher"] == "openai"
+
+    refresh = _run(
+        client, rubric, text="Python programming", matcher="lexical",
+        skill_evaluation_id=llm["skill_evaluation_id"],
+    )
+    assert refresh.status_code == 400
+    rows = db.query(models.AIEvaluatedSkill).filter_by(skill_evaluation_id=llm["skill_evaluation_id"]).all()
+    assert {r.matcher for r in rows} == {"openai"}
+    assert sorted(r.id for r in rows) == sorted(e["id"] for e in llm["evaluations"])
+
+    preview = _run(
+        client, rubric, text="Python programming", matcher="lexical", portfolio_id=llm["portfolio_id"],
+    )
+    assert preview.status_code == 200
+    assert preview.json()["matcher"] == "lexical"
+    portfolio = db.get(models.Portfolio, llm["portfolio_id"])
+    assert portfolio.classification_json["summary"] == "LLM summary"
+
+
+def test_llm_run_replaces_lexical_preview(client, db, rubric, fake_llm):
+    import models
+
+    preview = _run(client, rubric, text="Python programming", matcher="lexical").json()
+    refresh = _run(
+        client, rubric, text="Python programming", matcher="openai",
+        skill_evaluation_id=preview["skill_evaluation_id"],
+    )
+    assert refresh.status_code == 200
+    rows = db.query(models.AIEvaluatedSkill).filter_by(skill_evaluation_id=preview["skill_evaluation_id"]).all()
+    assert {r.matcher for r in rows} == {"openai"}
+    assert db.get(models.Portfolio, preview["portfolio_id"]).classification_json["summary"] == "LLM summary"
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from services import file_staging
+from services.file_staging import claim_staged_file, resolve_staged_file, stage_file
+
+
+def _stage(tmp_path, data: bytes = b"%PDF-1.4 test") -> str:
+    src = tmp_path / "upload.pdf"
+    src.write_bytes(data)
+    return stage_file(src, sha256="ab" * 32, size=len(data), filename="upload.pdf")
+
+
+def test_claim_consumes_token(tmp_path):
+    token = _stage(tmp_path)
+    data_path, meta_path = file_staging._paths(token)
+
+    with claim_staged_file(token) as staged:
+        assert staged.path.read_bytes() == b"%PDF-1.4 test"
+
+    assert not data_path.exists() and not meta_path.exists()
+    assert not staged.path.exists()
+    with pytest.raises(ValueError):
+        resolve_staged_file(token)
+    with pytest.raises(ValueError):
+        with claim_staged_file(token):
+            pass
+
+
+def test_failed_claim_keeps_token(tmp_path):
+    token = _stage(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        with claim_staged_file(token):
+            raise RuntimeError("blob store down")
+
+    assert resolve_staged_file(token).path.read_bytes() == b"%PDF-1.4 test"
+
+
+def test_claim_sweeps_expired_files(tmp_path, monkeypatch):
+    expired = _stage(tmp_path)
+    _, expired_meta = file_staging._paths(expired)
+    meta = json.loads(expired_meta.read_text())
+    expired_meta.write_text(json.dumps({**meta, "expires_at": 0}))
+    token = _stage(tmp_path)
+    monkeypatch.setattr(file_staging, "_last_gc", 0.0)
+
+    with claim_staged_file(token):
+        pass
+
+    assert not expired_meta.exists()
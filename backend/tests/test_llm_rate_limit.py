@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from services.llm_rate_limit import RateLimiter
+
+
+def _timed(limiter: RateLimiter, tokens: int) -> float:
+    async def acquire():
+        start = time.monotonic()
+        await limiter.acquire(tokens)
+        return time.monotonic() - start
+
+    return asyncio.run(acquire())
+
+
+def test_waits_for_token_refill():
+    limiter = RateLimiter(rpm=0, tpm=600)  # 10 tokens per second
+    assert _timed(limiter, 600) < 0.05
+    assert _timed(limiter, 5) >= 0.4
+    assert limiter.stats()["admitted"] == 2
+
+
+def test_settle_returns_unused_tokens():
+    limiter = RateLimiter(rpm=0, tpm=600)
+    _timed(limiter, 600)
+    limiter.settle(600, 100)
+    assert _timed(limiter, 400) < 0.05
+
+
+def test_request_bucket_and_pause():
+    limiter = RateLimiter(rpm=60, tpm=0)  # one request per second
+    for _ in range(60):
+        limiter.requests.take(1)
+    assert _timed(limiter, 0) >= 0.9
+
+    limiter = RateLimiter(rpm=0, tpm=0)
+    limiter.pause(0.3)
+    assert _timed(limiter, 1000) >= 0.25
+    assert limiter.stats()["throttled_429"] == 1
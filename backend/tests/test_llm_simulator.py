@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from services.llm_simulator import SimulatedOpenAITransport
+
+CHAT_URL = "https://api.openai.com/v1/chat/completions"
+REQUEST = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.0}
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "{}"}}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+def _gzip_upstream(request: httpx.Request) -> httpx.Response:
+    body = gzip.compress(json.dumps(COMPLETION).encode("utf-8"))
+    return httpx.Response(
+        200,
+        headers={"content-type": "application/json", "content-encoding": "gzip"},
+        content=body,
+    )
+
+
+async def _post(transport: httpx.AsyncBaseTransport, body: dict) -> httpx.Response:
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.post(CHAT_URL, json=body)
+        await response.aread()
+        return response
+
+
+def test_record_then_replay_compressed_upstream(tmp_path):
+    recorder = SimulatedOpenAITransport(
+        "record", upstream=httpx.MockTransport(_gzip_upstream), cassette_dir=tmp_path
+    )
+    recorded = asyncio.run(_post(recorder, REQUEST))
+    assert recorded.status_code == 200
+    assert recorded.json() == COMPLETION
+    assert "content-encoding" not in recorded.headers
+
+    replayer = SimulatedOpenAITransport("replay", cassette_dir=tmp_path)
+    replayed = asyncio.run(_post(replayer, REQUEST))
+    assert replayed.status_code == 200
+    assert replayed.json() == COMPLETION
+
+
+def test_replay_miss_is_404(tmp_path):
+    replayer = SimulatedOpenAITransport("replay", cassette_dir=tmp_path)
+    response = asyncio.run(_post(replayer, {**REQUEST, "messages": [{"role": "user", "content": "other"}]}))
+    assert response.status_code == 404
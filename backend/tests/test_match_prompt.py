@@ -0,0 +1,104 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import match_prompt, openai_service
+from services.match_prompt import compile_criteria, compile_within_budget
+from services.openai_service import OpenAIService
+
+
+def _criteria(skills: int = 4, levels: int = 2) -> list[dict]:
+    return [
+        {
+            "criteria_history_id": skill * 10 + level,
+            "rubric_skill_history_id": skill,
+            "level_history_id": level,
+            "description": f"skill {skill} level {level} " + "detail " * 20,
+        }
+        for skill in range(1, skills + 1)
+        for level in range(1, levels + 1)
+    ]
+
+
+def _response(content: str, finish_reason: str = "stop", completion_tokens: int = 50):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+        usage=SimpleNamespace(completion_tokens=completion_tokens),
+    )
+
+
+ANSWER = json.dumps({"c": {"summary": "ok"}, "m": [["c1", 0.9, "evidence"]]})
+
+
+def test_truncated_answer_is_retried_with_larger_cap():
+    svc = OpenAIService()
+    compiled = compile_criteria(_criteria())
+    caps = []
+
+    async def fake_chat_completion(**kwargs):
+        caps.append(kwargs["max_tokens"])
+        return _response('{"c": {}, "m": [["c1", 0.9', "length") if len(caps) == 1 else _response(ANSWER)
+
+    svc._chat_completion = fake_chat_completion
+    result = asyncio.run(svc._match_chunk_to_criteria("text", compiled, {}))
+
+    assert caps == [compiled.max_output_tokens(), 2 * compiled.max_output_tokens()]
+    assert [m["criteria_history_id"] for m in result["matches"]] == [11]
+
+
+def test_truncated_answer_at_ceiling_is_split_by_skill(monkeypatch):
+    monkeypatch.setattr(openai_service, "MATCH_MAX_OUTPUT_TOKENS", 1)
+    svc = OpenAIService()
+    compiled = compile_criteria(_criteria(skills=2))
+    tables = []
+
+    async def fake_chat_completion(**kwargs):
+        system = kwargs["messages"][0]["content"]
+        tables.append(system)
+        if "|s2|" in system:
+            return _response("{", "length")
+        return _response(ANSWER)
+
+    svc._chat_completion = fake_chat_completion
+    result = asyncio.run(svc._match_chunk_to_criteria("text", compiled, {}))
+
+    assert len(tables) == 3
+    assert sorted(m["rubric_skill_history_id"] for m in result["matches"]) == [1, 2]
+
+
+def test_oversized_criteria_table_is_split(monkeypatch):
+    criteria = _criteria(skills=4)
+    whole = compile_criteria(criteria)
+    budget = match_prompt.estimate_text_tokens(whole.static_prompt) // 2 + match_prompt.MATCH_MIN_TEXT_TOKENS
+    monkeypatch.setattr(match_prompt, "MATCH_PROMPT_TOKEN_BUDGET", budget)
+
+    compiled = compile_within_budget(criteria, {})
+
+    assert len(compiled) > 1
+    assert all(c.fits_budget({}) for c in compiled)
+    assert sum(len(c.by_local_id) for c in compiled) == len(criteria)
+
+
+def test_decode_compact_rows():
+    compiled = compile_criteria(_criteria(skills=2))
+    decoded = match_prompt.decode_matches(
+        compiled,
+        {"c": {"summary": "s"}, "m": [["c3", "0.8", "evidence"], ["c99", 0.9, "x"], ["c1"], "junk"]},
+    )
+    assert decoded["classification"] == {"summary": "s"}
+    assert [(m["criteria_history_id"], m["confidence"], m["matched_text"]) for m in decoded["matches"]] == [
+        (21, 0.8, "evidence"),
+        (11, 0.0, None),
+    ]
+    assert decoded["matches"][0]["rubric_skill_history_id"] == 2
+
+
+def test_decode_legacy_shape_and_errors():
+    compiled = compile_criteria(_criteria(skills=1))
+    legacy = {"classification": {"summary": "s"}, "matches": [{"criteria_history_id": 11, "confidence": "0.5"}]}
+    assert match_prompt.decode_matches(compiled, legacy)["matches"][0]["confidence"] == 0.5
+    assert match_prompt.decode_matches(compiled, [])["matches"] == []
+    with pytest.raises(ValueError):
+        match_prompt.decode_matches(compiled, "not json")
@@ -0,0 +1,22 @@
+from services.match_routing import conflicting_skills, skills_to_escalate
+
+
+def _match(skill, level, confidence):
+    return {"rubric_skill_history_id": skill, "level_history_id": level, "confidence": confidence}
+
+
+def test_several_levels_in_one_chunk_is_not_a_conflict():
+    chunk = [_match(1, 1, 0.95), _match(1, 2, 0.9)]
+    conflicts = conflicting_skills([chunk])
+    assert conflicts == set()
+    assert skills_to_escalate([_match(1, 1, 0.95)], conflicts, 0.6) == set()
+
+
+def test_different_best_levels_across_chunks_conflict():
+    first = [_match(1, 1, 0.95), _match(1, 2, 0.9), _match(2, 5, 0.9)]
+    second = [_match(1, 2, 0.9), _match(2, 5, 0.8)]
+    assert conflicting_skills([first, second]) == {1}
+
+
+def test_low_confidence_escalates():
+    assert skills_to_escalate([_match(1, 1, 0.4), _match(2, 3, 0.9)], set(), 0.6) == {1}
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+import pytest
+
+from services.ocr_pool import OCRPool, OCRPoolBusyError
+
+
+def test_long_document_on_idle_pool_is_not_rejected():
+    # 8 pages through 1 worker take ~1.6s, longer than the 1s admission timeout.
+    pool = OCRPool(workers=1, max_queue=2, queue_timeout=1)
+    results = asyncio.run(pool.run_many(time.sleep, [(0.2,)] * 8))
+    assert results == [None] * 8
+    stats = pool.stats()
+    assert stats["completed"] == 8
+    assert stats["rejected"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_saturated_pool_rejects_new_document():
+    pool = OCRPool(workers=1, max_queue=0, queue_timeout=0.2)
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(time.sleep, 1.0))
+        await asyncio.sleep(0.05)
+        with pytest.raises(OCRPoolBusyError):
+            await pool.run_many(time.sleep, [(0,)])
+        await busy
+
+    asyncio.run(scenario())
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from services import matchers
+from services.openai_service import OpenAIService
+
+
+def _sharded_service(fail_skill_names: set[str], criteria_names: dict[int, str]):
+    """OpenAIService with one skill per shard; shards of ``fail_skill_names`` raise."""
+    svc = OpenAIService()
+    svc.match_skills_per_shard = 1
+
+    async def fake_match_chunk(text, compiled, classification, part="full", model=None):
+        criteria = list(compiled.by_local_id.values())
+        if any(criteria_names.get(c["criteria_history_id"]) in fail_skill_names for c in criteria):
+            raise RuntimeError("provider unavailable")
+        return {
+            "classification": {"summary": "partial"},
+            "matches": [{**criteria[0], "confidence": 0.9, "matched_from": "text"}],
+        }
+
+    svc._match_chunk_to_criteria = fake_match_chunk
+    return svc
+
+
+def _criteria(skills: int = 3) -> tuple[list[dict], dict[int, str]]:
+    criteria = [
+        {
+            "criteria_history_id": skill * 10 + level,
+            "rubric_skill_history_id": skill,
+            "level_history_id": level,
+            "description": f"skill {skill} level {level}",
+        }
+        for skill in range(1, skills + 1)
+        for level in (1, 2)
+    ]
+    return criteria, {c["criteria_history_id"]: f"skill {c['rubric_skill_history_id']}" for c in criteria}
+
+
+def test_failed_shard_keeps_other_matches():
+    criteria, names = _criteria()
+    svc = _sharded_service({"skill 2"}, names)
+
+    result = asyncio.run(svc._match_text_to_criteria("text", {}, criteria))
+
+    assert result["failed_skills"] == [2]
+    assert sorted(m["rubric_skill_history_id"] for m in result["matches"]) == [1, 3]
+    assert result["classification"]["summary"] == "partial"
+
+
+def test_every_shard_failing_raises():
+    criteria, names = _criteria()
+    svc = _sharded_service({"skill 1", "skill 2", "skill 3"}, names)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(svc._match_text_to_criteria("text", {}, criteria))
+
+
+def _rubric_service(db, rubric, fail_skill_names, monkeypatch):
+    import models
+
+    rows = (
+        db.query(models.CriteriaHistory.id, models.RubricSkillHistory.name)
+        .join(models.RubricSkillHistory, models.CriteriaHistory.rubric_skill_history_id == models.RubricSkillHistory.id)
+        .join(models.RubricScoreHistory, models.RubricSkillHistory.rubric_history_id == models.RubricScoreHistory.id)
+        .filter(models.RubricScoreHistory.rubric_score_id == rubric["rubric_id"])
+        .all()
+    )
+    svc = _sharded_service(fail_skill_names, dict(rows))
+    monkeypatch.setitem(matchers.MATCHERS, "openai", lambda: svc)
+
+
+def _run(client, rubric, text):
+    return client.post(
+        "/ai_evaluation/run",
+        json={"rubric_id": rubric["rubric_id"], "user_id": rubric["user_id"], "text": text, "matcher": "openai"},
+    )
+
+
+def test_partial_evaluation_is_saved_with_failed_skills(client, db, rubric, monkeypatch):
+    import models
+
+    _rubric_service(db, rubric, {"Teamwork"}, monkeypatch)
+
+    response = _run(client, rubric, "partial evaluation text")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["failed_skills"] == ["Teamwork"]
+    assert sorted(e["skill_name"] for e in body["evaluations"]) == ["Database design", "Python programming"]
+    saved = db.query(models.AIEvaluatedSkill).filter_by(skill_evaluation_id=body["skill_evaluation_id"]).all()
+    assert sorted(r.skill_name for r in saved) == ["Database design", "Python programming"]
+    assert all(r.level_rank == 1 for r in saved)
+
+
+def test_evaluation_fails_when_every_shard_fails(client, db, rubric, monkeypatch):
+    _rubric_service(db, rubric, {"Python programming", "Teamwork", "Database design"}, monkeypatch)
+
+    response = _run(client, rubric, "failing evaluation text")
+
+    assert response.status_code == 500
+    assert "provider unavailable" in response.json()["detail"]
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import models
+from api.v1.evaluation import _parse_byte_range
+from services.blob_store import put_bytes
+
+SIZE = 982
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=900-", (900, SIZE - 1)),
+        ("bytes=900-5000", (900, SIZE - 1)),
+        ("bytes=-100", (SIZE - 100, SIZE - 1)),
+        ("bytes=-5000", (0, SIZE - 1)),
+    ],
+)
+def test_parse_satisfiable_ranges(header, expected):
+    assert _parse_byte_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["bytes=5-2", "bytes=abc-", "bytes=1-x", "items=0-10", "bytes=0-1,5-6", "bytes=", "bytes=-", "bytes=--1", "bytes=+5-9"],
+)
+def test_malformed_or_multi_range_is_ignored(header):
+    assert _parse_byte_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=982-", "bytes=99999-", "bytes=982-990", "bytes=-0"])
+def test_unsatisfiable_ranges_raise_416(header):
+    with pytest.raises(HTTPException) as exc:
+        _parse_byte_range(header, SIZE)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == f"bytes */{SIZE}"
+
+
+@pytest.fixture
+def stored_file(db):
+    data = bytes(range(256)) * 3 + b"%PDF-tail" * 20  # 948 bytes
+    sha256 = put_bytes(data)
+    portfolio = models.Portfolio(
+        filename="cv.pdf", created_at=datetime.utcnow(), file_sha256=sha256, file_size=len(data)
+    )
+    db.add(portfolio)
+    db.commit()
+    return portfolio.id, sha256, data
+
+
+def test_full_download(client, stored_file):
+    pid, sha256, data = stored_file
+    r = client.get(f"/portfolio/{pid}/file")
+    assert r.status_code == 200
+    assert r.content == data
+    assert r.headers["etag"] == f'"{sha256}"'
+    assert r.headers["accept-ranges"] == "bytes"
+
+
+def test_range_returns_206(client, stored_file):
+    pid, _, data = stored_file
+    r = client.get(f"/portfolio/{pid}/file", headers={"Range": "bytes=-10"})
+    assert r.status_code == 206
+    assert r.content == data[-10:]
+    assert r.headers["content-range"] == f"bytes {len(data) - 10}-{len(data) - 1}/{len(data)}"
+
+
+def test_range_past_end_returns_416(client, stored_file):
+    pid, _, data = stored_file
+    r = client.get(f"/portfolio/{pid}/file", headers={"Range": "bytes=99999-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(data)}"
+
+
+def test_stale_if_range_serves_full_file(client, stored_file):
+    pid, _, data = stored_file
+    r = client.get(f"/portfolio/{pid}/file", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert r.status_code == 200
+    assert r.content == data
+
+
+def test_if_none_match_returns_304(client, stored_file):
+    pid, sha256, _ = stored_file
+    r = client.get(f"/portfolio/{pid}/file", headers={"If-None-Match": f'W/"{sha256}"'})
+    assert r.status_code == 304
+    assert r.content == b""
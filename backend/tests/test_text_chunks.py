@@ -0,0 +1,36 @@
+from services.llm_rate_limit import estimate_tokens
+from services.text_chunks import estimate_text_tokens, split_text
+
+
+def test_estimate_counts_thai_per_character():
+    assert estimate_text_tokens("hello world!") == 3
+    assert estimate_text_tokens("ภาษาไทย") == 7
+    assert estimate_tokens([{"content": "ภาษาไทย"}], 100) == 107
+
+
+def test_thai_chunks_fit_token_budget():
+    text = "ทักษะการเขียนโปรแกรม" * 200
+    chunks = split_text(text, 300, overlap_tokens=30)
+    assert len(chunks) > 1
+    assert all(estimate_text_tokens(c) <= 300 for c in chunks)
+
+
+def test_short_text_is_one_chunk():
+    assert split_text("  short text  ", 100) == ["short text"]
+    assert split_text("   ", 100) == []
+
+
+def test_chunks_fit_budget_and_break_at_paragraphs():
+    paragraphs = [f"Paragraph {n} " + "word " * 60 for n in range(10)]
+    chunks = split_text("\n\n".join(paragraphs), 200)
+    assert len(chunks) > 1
+    assert all(estimate_text_tokens(c) <= 200 for c in chunks)
+    assert all(c.startswith("Paragraph") for c in chunks)
+    assert " ".join(chunks).split() == " ".join(paragraphs).split()
+
+
+def test_chunks_overlap():
+    text = " ".join(f"w{n:03d}" for n in range(400))
+    chunks = split_text(text, 100, overlap_tokens=20)
+    for first, second in zip(chunks, chunks[1:]):
+        assert second.split()[0] in first.split()